@@ -8,6 +8,86 @@ from statistics import median
 
 RAW_PATH = Path("data") / "output" / "raw_runs.csv"
 SUMMARY_PATH = Path("data") / "output" / "summary.csv"
+IMPORT_SUMMARY_PATH = Path("data") / "output" / "import_summary.csv"
+TIMINGS_PATH = Path("data") / "output" / "raw_timings.csv"
+TIMINGS_SUMMARY_PATH = Path("data") / "output" / "timings_summary.csv"
+SCALE_FIT_PATH = Path("data") / "output" / "scale_fit.csv"
+ORDER_EFFECTS_PATH = Path("data") / "output" / "order_effects.csv"
+# Run configuration the summaries are split by, with the value rows that predate
+# the column were run with.
+CONFIG_DEFAULTS = {
+    "scale": "",
+    "data_profile": "uniform",
+    "delta_rows": "0",
+    "server_profile": "stock",
+    "load_workers": "1",
+    "prepared_statements": "0",
+    "revenue_mode": "computed",
+    "sales_layout": "heap",
+    "xdist_workers": "1",
+    "capture_plans": "0",
+    "pg_stat_statements": "0",
+    "pipeline": "0",
+}
+# raw_runs.csv rows are further split into whole-run totals and per-scenario query phases.
+RUN_SPLIT_DEFAULTS = {**CONFIG_DEFAULTS, "measure": "total"}
+# The scale fit runs across scales, so everything but the scale splits it.
+FIT_SPLIT_DEFAULTS = {key: value for key, value in RUN_SPLIT_DEFAULTS.items() if key != "scale"}
+SCALE_FIT_FIELDS = [
+    "tool",
+    "scenario",
+    *FIT_SPLIT_DEFAULTS,
+    "scales",
+    "fixed_ms",
+    "per_row_us",
+    "r2",
+    "crossover_rows",
+]
+ORDER_EFFECTS_FIELDS = [
+    "tool",
+    "scenario",
+    *RUN_SPLIT_DEFAULTS,
+    "schedule",
+    "n",
+    "position_rho",
+    "drift",
+    "after_same_tool_ms",
+    "after_other_tool_ms",
+]
+TIMINGS_SUMMARY_FIELDS = ["tool", "scenario", *CONFIG_DEFAULTS, "name", "n", "mean_ms", "median_ms", "p95_ms", "max_ms"]
+
+# (summary column, raw column, reducer) for the optional resource samples.
+RESOURCE_SUMMARY = [
+    ("mean_cpu_user_ms", "cpu_user_ms", "mean"),
+    ("mean_cpu_sys_ms", "cpu_sys_ms", "mean"),
+    ("max_peak_rss_kb", "peak_rss_kb", "max"),
+    ("mean_pg_blks_read", "pg_blks_read", "mean"),
+    ("mean_pg_blks_hit", "pg_blks_hit", "mean"),
+    ("mean_pg_temp_bytes", "pg_temp_bytes", "mean"),
+    ("mean_pg_stmt_exec_ms", "pg_stmt_exec_ms", "mean"),
+    ("max_container_cpu_pct", "container_cpu_peak_pct", "max"),
+    ("mean_container_cpu_pct", "container_cpu_mean_pct", "mean"),
+    ("max_container_mem_mb", "container_mem_peak_mb", "max"),
+]
+
+SUMMARY_FIELDS = [
+    "tool",
+    "scenario",
+    *RUN_SPLIT_DEFAULTS,
+    "n",
+    "mean_ms",
+    "variance_ms2",
+    "std_ms",
+    "min_ms",
+    "median_ms",
+    "p95_ms",
+    "max_ms",
+    "cv",
+    # Median of the same run under plain pytest over this median, for --xdist-workers > 1.
+    "xdist_speedup",
+    "startup_ms",
+    *(name for name, _, _ in RESOURCE_SUMMARY),
+]
 
 
 def percentile_nearest_rank(values: list[float], p: float) -> float:
@@ -19,31 +99,252 @@ def percentile_nearest_rank(values: list[float], p: float) -> float:
     return sorted_vals[rank - 1]
 
 
+def load_startup_overhead() -> dict[str, str]:
+    """Warm interpreter+import overhead per tool, from bench/run_import_time.py."""
+    if not IMPORT_SUMMARY_PATH.exists():
+        return {}
+    with IMPORT_SUMMARY_PATH.open(newline="", encoding="utf-8") as handle:
+        return {
+            row["tool"]: row["startup_overhead_ms"]
+            for row in csv.DictReader(handle)
+            if row.get("mode") == "warm"
+        }
+
+
+def config_key(row: dict, defaults: dict[str, str] = CONFIG_DEFAULTS) -> tuple[str, ...]:
+    return tuple(row.get(column) or default for column, default in defaults.items())
+
+
+def summarize_resources(samples: dict[str, list[float]]) -> dict[str, str]:
+    summary = {}
+    for name, column, reducer in RESOURCE_SUMMARY:
+        values = samples.get(column, [])
+        if not values:
+            summary[name] = ""
+        elif reducer == "max":
+            summary[name] = f"{max(values):.3f}"
+        else:
+            summary[name] = f"{sum(values) / len(values):.3f}"
+    return summary
+
+
+def fit_fixed_plus_per_row(points: dict[int, list[float]]) -> tuple[float, float, float] | None:
+    """Fit duration_ms = fixed + per_row * rows over the per-scale medians.
+
+    Weighted by 1/median^2 (relative error): on a geometric sweep plain least
+    squares is decided by the largest size and says little about the fixed part.
+    """
+    xs = sorted(points)
+    ys = [median(points[x]) for x in xs]
+    # A line needs two distinct row counts, and a zero median has no relative error.
+    if len(xs) < 2 or min(ys) <= 0:
+        return None
+    ws = [1 / (y * y) for y in ys]
+    total_w = sum(ws)
+    mean_x = sum(w * x for w, x in zip(ws, xs)) / total_w
+    mean_y = sum(w * y for w, y in zip(ws, ys)) / total_w
+    sxx = sum(w * (x - mean_x) ** 2 for w, x in zip(ws, xs))
+    sxy = sum(w * (x - mean_x) * (y - mean_y) for w, x, y in zip(ws, xs, ys))
+    per_row = sxy / sxx
+    fixed = mean_y - per_row * mean_x
+    ss_res = sum(w * (y - fixed - per_row * x) ** 2 for w, x, y in zip(ws, xs, ys))
+    ss_tot = sum(w * (y - mean_y) ** 2 for w, y in zip(ws, ys))
+    r2 = 1 - ss_res / ss_tot if ss_tot > 0 else 1.0
+    return fixed, per_row, r2
+
+
+def summarize_scale_fits(points: dict[tuple, dict[int, list[float]]]) -> list[dict]:
+    """Per tool: fixed overhead, per-row cost, and the size where the two are equal."""
+    rows = []
+    for (tool, scenario, config), by_rows in sorted(points.items()):
+        fit = fit_fixed_plus_per_row(by_rows)
+        if fit is None:
+            continue
+        fixed, per_row, r2 = fit
+        crossover = fixed / per_row if fixed > 0 and per_row > 0 else None
+        rows.append(
+            {
+                "tool": tool,
+                "scenario": scenario,
+                **dict(zip(FIT_SPLIT_DEFAULTS, config)),
+                "scales": len(by_rows),
+                "fixed_ms": f"{fixed:.3f}",
+                "per_row_us": f"{per_row * 1000:.6f}",
+                "r2": f"{r2:.4f}",
+                "crossover_rows": f"{crossover:.0f}" if crossover is not None else "",
+            }
+        )
+    if rows:
+        with SCALE_FIT_PATH.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=SCALE_FIT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
+
+
+def average_ranks(values: list[float]) -> list[float]:
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for index in order[start : end + 1]:
+            ranks[index] = (start + end) / 2 + 1
+        start = end + 1
+    return ranks
+
+
+def spearman_rho(xs: list[float], ys: list[float]) -> float | None:
+    if len(xs) < 3:
+        return None
+    rx, ry = average_ranks(xs), average_ranks(ys)
+    mean_x, mean_y = sum(rx) / len(rx), sum(ry) / len(ry)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(rx, ry))
+    sxx = sum((x - mean_x) ** 2 for x in rx)
+    syy = sum((y - mean_y) ** 2 for y in ry)
+    if sxx == 0 or syy == 0:
+        return None
+    return sxy / math.sqrt(sxx * syy)
+
+
+def summarize_order_effects(scheduled: dict[tuple, list[tuple[int, float]]], slots: dict[tuple, str]) -> list[dict]:
+    """Per cell of each interleaved schedule: does its duration follow the slot position, or the tool run before it?
+
+    position_rho is Spearman's rho of duration against position, and drift marks it as
+    significant (|t| > 2, roughly p < 0.05). Carry-over from the previous slot (a warm
+    page cache, a container still shutting down) shows as a gap between the medians
+    after a slot of the same tool and after one of another tool.
+    """
+    rows = []
+    for (tool, scenario, config, schedule), points in sorted(scheduled.items()):
+        positions = [position for position, _ in points]
+        durations = [duration for _, duration in points]
+        rho = spearman_rho(positions, durations)
+        drift = False
+        if rho is not None and len(points) > 3:
+            drift = abs(rho) >= 1 or abs(rho) * math.sqrt((len(points) - 2) / (1 - rho * rho)) > 2
+        after: dict[bool, list[float]] = {True: [], False: []}
+        for position, duration in points:
+            previous = slots.get((schedule, position - 1))
+            if previous:
+                after[previous == tool].append(duration)
+        rows.append(
+            {
+                "tool": tool,
+                "scenario": scenario,
+                **dict(zip(RUN_SPLIT_DEFAULTS, config)),
+                "schedule": schedule,
+                "n": len(points),
+                "position_rho": f"{rho:.3f}" if rho is not None else "",
+                "drift": "yes" if drift else "",
+                "after_same_tool_ms": f"{median(after[True]):.3f}" if after[True] else "",
+                "after_other_tool_ms": f"{median(after[False]):.3f}" if after[False] else "",
+            }
+        )
+    if rows:
+        with ORDER_EFFECTS_PATH.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=ORDER_EFFECTS_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    return rows
+
+
+def summarize_timings() -> list[dict]:
+    """Summarise harness-side phase timings (container start, load, ...) per tool/scenario."""
+    if not TIMINGS_PATH.exists():
+        return []
+    groups: dict[tuple, list[float]] = {}
+    with TIMINGS_PATH.open(newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            if row.get("phase") != "measured":
+                continue
+            # As in raw_runs.csv, profiled iterations carry profiler overhead.
+            if row.get("profiler"):
+                continue
+            try:
+                duration = float(row.get("duration_ms", ""))
+            except ValueError:
+                continue
+            key = (row["tool"], row["scenario"], config_key(row), row["name"])
+            groups.setdefault(key, []).append(duration)
+
+    rows = []
+    for (tool, scenario, config, name), values in sorted(groups.items()):
+        rows.append(
+            {
+                "tool": tool,
+                "scenario": scenario,
+                **dict(zip(CONFIG_DEFAULTS, config)),
+                "name": name,
+                "n": len(values),
+                "mean_ms": f"{sum(values) / len(values):.3f}",
+                "median_ms": f"{median(values):.3f}",
+                "p95_ms": f"{percentile_nearest_rank(values, 0.95):.3f}",
+                "max_ms": f"{max(values):.3f}",
+            }
+        )
+    with TIMINGS_SUMMARY_PATH.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=TIMINGS_SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
 def main() -> None:
     if not RAW_PATH.exists():
         raise SystemExit(f"Missing {RAW_PATH}")
 
-    groups: dict[tuple[str, str], list[float]] = {}
+    groups: dict[tuple, list[float]] = {}
+    resources: dict[tuple, dict[str, list[float]]] = {}
+    scale_points: dict[tuple, dict[int, list[float]]] = {}
+    # Interleaved runs: durations by slot position per cell, and which tool ran in each slot.
+    scheduled: dict[tuple, list[tuple[int, float]]] = {}
+    slots: dict[tuple, str] = {}
 
     with RAW_PATH.open(newline="", encoding="utf-8") as handle:
         reader = csv.DictReader(handle)
         for row in reader:
             if row.get("phase") != "measured":
                 continue
+            if row.get("schedule"):
+                slots[(row["schedule"], int(row["schedule_position"]))] = row.get("tool", "")
             if row.get("exit_code") != "0":
                 continue
+            # Profiled iterations carry profiler overhead; keep them out of the timings.
+            if row.get("profiler"):
+                continue
             tool = row.get("tool", "")
             scenario = row.get("scenario", "")
+            config = config_key(row, RUN_SPLIT_DEFAULTS)
             try:
                 duration = float(row.get("duration_ms", "0"))
             except ValueError:
                 continue
-            groups.setdefault((tool, scenario), []).append(duration)
+            groups.setdefault((tool, scenario, config), []).append(duration)
+            if row.get("schedule"):
+                scheduled.setdefault((tool, scenario, config, row["schedule"]), []).append(
+                    (int(row["schedule_position"]), duration)
+                )
+            if row.get("rows"):
+                fit_key = (tool, scenario, config_key(row, FIT_SPLIT_DEFAULTS))
+                scale_points.setdefault(fit_key, {}).setdefault(int(row["rows"]), []).append(duration)
+            samples = resources.setdefault((tool, scenario, config), {})
+            for _, column, _ in RESOURCE_SUMMARY:
+                try:
+                    samples.setdefault(column, []).append(float(row.get(column) or ""))
+                except ValueError:
+                    continue
 
     SUMMARY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    startup = load_startup_overhead()
+
+    medians = {key: median(values) for key, values in groups.items() if values}
+    xdist_index = list(RUN_SPLIT_DEFAULTS).index("xdist_workers")
 
     rows = []
-    for (tool, scenario), values in sorted(groups.items()):
+    for (tool, scenario, config), values in sorted(groups.items()):
         n = len(values)
         mean = sum(values) / n if n else 0.0
         if n > 1:
@@ -56,11 +357,15 @@ def main() -> None:
         median_v = median(values) if values else 0.0
         p95_v = percentile_nearest_rank(values, 0.95) if values else 0.0
         cv = std / mean if mean > 0 else 0.0
+        serial = config[:xdist_index] + ("1",) + config[xdist_index + 1 :]
+        baseline = medians.get((tool, scenario, serial)) if serial != config else None
+        speedup = f"{baseline / median_v:.2f}" if baseline and median_v > 0 else ""
 
         rows.append(
             {
                 "tool": tool,
                 "scenario": scenario,
+                **dict(zip(RUN_SPLIT_DEFAULTS, config)),
                 "n": n,
                 "mean_ms": f"{mean:.3f}",
                 "variance_ms2": f"{variance:.3f}",
@@ -70,26 +375,14 @@ def main() -> None:
                 "p95_ms": f"{p95_v:.3f}",
                 "max_ms": f"{max_v:.3f}",
                 "cv": f"{cv:.6f}",
+                "xdist_speedup": speedup,
+                "startup_ms": startup.get(tool, "") if config[-1] == "total" else "",
+                **summarize_resources(resources.get((tool, scenario, config), {})),
             }
         )
 
     with SUMMARY_PATH.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=[
-                "tool",
-                "scenario",
-                "n",
-                "mean_ms",
-                "variance_ms2",
-                "std_ms",
-                "min_ms",
-                "median_ms",
-                "p95_ms",
-                "max_ms",
-                "cv",
-            ],
-        )
+        writer = csv.DictWriter(handle, fieldnames=SUMMARY_FIELDS)
         writer.writeheader()
         writer.writerows(rows)
 
@@ -97,6 +390,7 @@ def main() -> None:
         headers = [
             "tool",
             "scenario",
+            *RUN_SPLIT_DEFAULTS,
             "n",
             "mean_ms",
             "variance_ms2",
@@ -107,11 +401,40 @@ def main() -> None:
             "max_ms",
             "cv",
         ]
+        if any(row["xdist_speedup"] for row in rows):
+            headers.append("xdist_speedup")
+        if startup:
+            headers.append("startup_ms")
+        headers += [name for name, _, _ in RESOURCE_SUMMARY if any(row[name] for row in rows)]
         print("| " + " | ".join(headers) + " |")
         print("| " + " | ".join(["---"] * len(headers)) + " |")
         for row in rows:
             print("| " + " | ".join(str(row[h]) for h in headers) + " |")
 
+    fit_rows = summarize_scale_fits(scale_points)
+    if fit_rows:
+        print()
+        print("| " + " | ".join(SCALE_FIT_FIELDS) + " |")
+        print("| " + " | ".join(["---"] * len(SCALE_FIT_FIELDS)) + " |")
+        for row in fit_rows:
+            print("| " + " | ".join(str(row[h]) for h in SCALE_FIT_FIELDS) + " |")
+
+    order_rows = summarize_order_effects(scheduled, slots)
+    if order_rows:
+        print()
+        print("| " + " | ".join(ORDER_EFFECTS_FIELDS) + " |")
+        print("| " + " | ".join(["---"] * len(ORDER_EFFECTS_FIELDS)) + " |")
+        for row in order_rows:
+            print("| " + " | ".join(str(row[h]) for h in ORDER_EFFECTS_FIELDS) + " |")
+
+    timing_rows = summarize_timings()
+    if timing_rows:
+        print()
+        print("| " + " | ".join(TIMINGS_SUMMARY_FIELDS) + " |")
+        print("| " + " | ".join(["---"] * len(TIMINGS_SUMMARY_FIELDS)) + " |")
+        for row in timing_rows:
+            print("| " + " | ".join(str(row[h]) for h in TIMINGS_SUMMARY_FIELDS) + " |")
+
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import argparse
 import csv
+import hashlib
+import json
 import os
 import subprocess
 import sys
@@ -9,18 +12,309 @@ from datetime import datetime
 from pathlib import Path
 from typing import TextIO
 
+from bench.profiling import PROFILERS
+from bench.resources import RESOURCE_COLUMNS
+from experiments.data_generator import (
+    DISTRIBUTION_PROFILES,
+    PGDATA_DIR,
+    REVENUE_MODES,
+    SALES_LAYOUTS,
+    SCALES,
+    SERVER_PROFILES,
+    count_sales_rows,
+    ensure_dataset_csv,
+    get_server_profile,
+)
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 CONTAINER_NAME = "postgres_tests"
 LOG_DIR = REPO_ROOT / "logs"
 POSTGRES_PORT = 15432
+# Identifies the settings a bench Postgres was started with, for --keep-server.
+SERVER_KEY_LABEL = "bench.server.key"
 
+SCENARIOS = ["S1", "S2", "S4", "S6"]
 
-def ensure_results_file(raw_path: Path) -> None:
-    raw_path.parent.mkdir(parents=True, exist_ok=True)
-    if not raw_path.exists():
-        with open(raw_path, "w", newline="", encoding="utf-8") as f:
+RAW_COLUMNS = [
+    "timestamp",
+    "tool",
+    "scenario",
+    "iteration",
+    "phase",
+    "duration_ms",
+    "exit_code",
+    "image",
+    "scale",
+    "data_profile",
+    # Sales rows actually loaded; the per-row cost in the scale fits is in these units.
+    "rows",
+    # Sales appended on top of the base dataset before the scenarios run.
+    "delta_rows",
+    "server_profile",
+    "load_workers",
+    "prepared_statements",
+    "revenue_mode",
+    "sales_layout",
+    # pytest-xdist worker processes the scenarios were spread over (1: plain pytest).
+    "xdist_workers",
+    # EXPLAIN (ANALYZE, BUFFERS) re-runs every scenario query inside the query phase.
+    "capture_plans",
+    # The bench Postgres preloaded pg_stat_statements (--sample-resources), which every statement pays for.
+    "pg_stat_statements",
+    # The next iteration's server was starting alongside this one (run_pytest_testcontainers --pipeline).
+    "pipeline",
+    # "total" for the whole invocation, "query" for one scenario's query phase within it.
+    "measure",
+    # Set when bench.run_interleaved ran the iteration: which schedule, and its 1-based slot in it.
+    "schedule",
+    "schedule_position",
+    "profiler",
+    *RESOURCE_COLUMNS,
+]
+
+
+def parse_scenarios(value: str) -> list[str]:
+    """--scenario value: one scenario, a comma-separated list, or "all"."""
+    if value.strip().lower() == "all":
+        return list(SCENARIOS)
+    scenarios = []
+    for part in value.split(","):
+        scenario = part.strip().upper()
+        if scenario not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {part.strip()!r}; expected {SCENARIOS} or all")
+        if scenario not in scenarios:
+            scenarios.append(scenario)
+    return scenarios
+
+
+def scenario_label(scenarios: list[str]) -> str:
+    """The scenario column of the run-level row: "all", "S1", "S1+S4", ..."""
+    if sorted(scenarios) == SCENARIOS:
+        return "all"
+    return "+".join(scenarios)
+
+
+def add_scenario_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--scenario",
+        type=parse_scenarios,
+        required=True,
+        help="S1, S2, S4, S6, a comma-separated list, or all (loads the dataset once)",
+    )
+
+
+def add_dataset_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scale", choices=list(SCALES), default="big")
+    parser.add_argument(
+        "--data-profile",
+        choices=list(DISTRIBUTION_PROFILES),
+        default="uniform",
+        help="value distribution of the generated dataset (skew, seasonality, NULLs, width)",
+    )
+
+
+def set_dataset_context(scale: str, profile: str) -> None:
+    """Point the harnesses at the dataset (generating it if needed) and record it."""
+    ensure_dataset_csv(scale, profile)
+    os.environ["DATA_SCALE"] = scale
+    os.environ["DATA_PROFILE"] = profile
+    set_run_context(scale=scale, data_profile=profile, rows=str(count_sales_rows(scale)))
+
+
+def add_server_profile_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--server-profile", choices=list(SERVER_PROFILES), default="stock")
+
+
+def add_load_workers_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--load-workers",
+        type=int,
+        default=1,
+        help="connections the harness loads the dataset over (sales is split into ranges)",
+    )
+
+
+def add_delta_rows_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--delta-rows",
+        type=int,
+        default=0,
+        help="append this many deterministic new sales after the base load (or to a --seeded image)",
+    )
+
+
+def add_prepared_statements_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--prepared-statements",
+        action="store_true",
+        help="connect through psycopg 3 with server-side prepared statements on the pooled connections",
+    )
+
+
+def add_revenue_mode_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--revenue-mode",
+        choices=REVENUE_MODES,
+        default="computed",
+        help="computed per query, a stored generated column, or stored plus materialised S1/S2 summaries",
+    )
+
+
+def add_xdist_workers_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--xdist-workers",
+        type=int,
+        nargs="+",
+        default=[1],
+        help="run the iterations once per worker count under pytest-xdist (1: plain pytest), "
+        "each worker on its own database; summary.csv reports the speedup over 1",
+    )
+
+
+def xdist_args(workers: int) -> list[str]:
+    return ["-n", str(workers)] if workers > 1 else []
+
+
+def add_sales_layout_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sales-layout",
+        choices=SALES_LAYOUTS,
+        default="heap",
+        help="sales as one heap or monthly range partitions on sale_ts; *_brin adds a BRIN index on sale_ts",
+    )
+
+
+def add_schedule_args(parser: argparse.ArgumentParser) -> None:
+    """The slot bench.run_interleaved runs an invocation as; left blank by a standalone run."""
+    parser.add_argument("--first-iteration", type=int, default=1, help="number of the first measured iteration")
+    parser.add_argument("--schedule", default="", help="interleaved schedule the iterations belong to")
+    parser.add_argument("--schedule-position", default="", help="slot of the iteration in that schedule")
+    parser.add_argument(
+        "--keep-server",
+        action="store_true",
+        help="reuse a running bench Postgres started with the same settings and leave it running; "
+        "bench.run_interleaved runs every slot on the server its warm-up ran on this way",
+    )
+
+
+def add_instrumentation_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sample-resources", action="store_true")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILERS, default=None)
+    parser.add_argument("--profile-every", type=int, default=1)
+
+
+# Columns that are constant for a whole runner invocation (image, server profile, ...).
+RUN_CONTEXT: dict[str, str] = {}
+
+# Run-context columns that distinguish otherwise identical runs in the summaries.
+CONFIG_COLUMNS = [
+    "scale",
+    "data_profile",
+    "delta_rows",
+    "server_profile",
+    "load_workers",
+    "prepared_statements",
+    "revenue_mode",
+    "sales_layout",
+    "xdist_workers",
+    "capture_plans",
+    "pg_stat_statements",
+    "pipeline",
+]
+
+# profiler: set when the iteration ran under cProfile or py-spy, whose overhead is in these timings.
+TIMING_COLUMNS = [
+    "timestamp",
+    "tool",
+    "scenario",
+    "iteration",
+    "phase",
+    *CONFIG_COLUMNS,
+    "profiler",
+    "name",
+    "duration_ms",
+]
+
+
+def set_run_context(**values: str) -> None:
+    RUN_CONTEXT.update(values)
+
+
+def harness_timings_path(raw_path: Path) -> Path:
+    """Scratch file the harness appends experiments.timings records to during one iteration."""
+    return raw_path.parent / ".harness_timings.jsonl"
+
+
+def reset_harness_timings(raw_path: Path) -> None:
+    path = harness_timings_path(raw_path)
+    path.unlink(missing_ok=True)
+    os.environ["BENCH_TIMINGS_PATH"] = str(path)
+
+
+def collect_harness_timings(
+    raw_path: Path,
+    tool: str,
+    scenario: str,
+    iteration: int,
+    phase: str,
+    profiler: str = "",
+) -> list[dict]:
+    """Move the harness timings of the last iteration into raw_timings.csv."""
+    scratch = harness_timings_path(raw_path)
+    if not scratch.exists():
+        return []
+    with open(scratch, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    scratch.unlink()
+
+    timings_path = raw_path.parent / "raw_timings.csv"
+    _ensure_header(timings_path, TIMING_COLUMNS)
+    timestamp = datetime.utcnow().isoformat()
+    with open(timings_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=TIMING_COLUMNS)
+        for record in records:
+            if record["name"] == "result":
+                # Result digests for the impact cache, not timings.
+                continue
+            writer.writerow(
+                {
+                    "timestamp": timestamp,
+                    "tool": tool,
+                    "scenario": record.get("scenario") or scenario,
+                    "iteration": iteration,
+                    "phase": phase,
+                    **{column: RUN_CONTEXT.get(column, "") for column in CONFIG_COLUMNS},
+                    "profiler": profiler,
+                    "name": record["name"],
+                    "duration_ms": record["duration_ms"],
+                }
+            )
+    return records
+
+
+def _ensure_header(path: Path, columns: list[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow(["timestamp", "tool", "scenario", "iteration", "phase", "duration_ms", "exit_code"])
+            writer.writerow(columns)
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames == columns:
+            return
+        rows = list(reader)
+
+    # Older result files lack the newer columns; rewrite them with blanks.
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, restval="", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def ensure_results_file(raw_path: Path) -> None:
+    _ensure_header(raw_path, RAW_COLUMNS)
 
 
 def write_run_row(
@@ -31,11 +325,49 @@ def write_run_row(
     phase: str,
     duration_ms: int,
     exit_code: int,
+    extra: dict[str, str] | None = None,
 ) -> None:
     timestamp = datetime.utcnow().isoformat()
+    row = {
+        "timestamp": timestamp,
+        "tool": tool,
+        "scenario": scenario,
+        "iteration": iteration,
+        "phase": phase,
+        "duration_ms": duration_ms,
+        "exit_code": exit_code,
+        "measure": "total",
+        **RUN_CONTEXT,
+        **(extra or {}),
+    }
     with open(raw_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([timestamp, tool, scenario, iteration, phase, duration_ms, exit_code])
+        writer = csv.DictWriter(f, fieldnames=RAW_COLUMNS, restval="")
+        writer.writerow(row)
+
+
+def write_query_rows(
+    raw_path: Path,
+    tool: str,
+    records: list[dict],
+    iteration: int,
+    phase: str,
+    exit_code: int,
+    extra: dict[str, str] | None = None,
+) -> None:
+    """Per-scenario query-phase rows from the harness's "query" timings."""
+    for record in records:
+        if record["name"] != "query" or not record.get("scenario"):
+            continue
+        write_run_row(
+            raw_path,
+            tool,
+            record["scenario"],
+            iteration,
+            phase,
+            record["duration_ms"],
+            exit_code,
+            {**(extra or {}), "measure": "query"},
+        )
 
 
 def remove_postgres_container() -> None:
@@ -53,9 +385,70 @@ def remove_postgres_container() -> None:
         )
 
 
-def ensure_postgres_container_running() -> None:
+def wait_for_postgres(container: str, timeout: int = 60) -> None:
+    # Connect over TCP: the entrypoint's temporary init server only listens on
+    # the unix socket, so this does not succeed before initialisation is done.
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        result = subprocess.run(
+            [
+                "docker",
+                "exec",
+                "-e", "PGPASSWORD=test_pass",
+                container,
+                "psql",
+                "-h", "127.0.0.1",
+                "-U", "test_user",
+                "-d", "postgres",
+                "-c", "SELECT 1;",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        if result.returncode == 0:
+            return
+        time.sleep(2)
+    raise RuntimeError(f"Postgres container not ready within {timeout} seconds.")
+
+
+def _running_server_key() -> str:
+    """The settings key of the bench Postgres if it is running, else ""."""
+    template = '{{.State.Running}} {{index .Config.Labels "' + SERVER_KEY_LABEL + '"}}'
+    result = subprocess.run(
+        ["docker", "inspect", "-f", template, CONTAINER_NAME],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    running, _, key = result.stdout.strip().partition(" ")
+    return key if running == "true" else ""
+
+
+def ensure_postgres_container_running(
+    track_statements: bool = False,
+    image: str = "postgres:15",
+    profile: str = "stock",
+    reuse: bool = False,
+) -> None:
+    """Start the bench Postgres; with reuse, keep one already running with the same settings."""
+    # The extension changes the server the iterations run on, so record it with them.
+    set_run_context(pg_stat_statements="1" if track_statements else "0")
+    server_key = hashlib.sha1(json.dumps([image, profile, track_statements]).encode("utf-8")).hexdigest()[:12]
+    if reuse and _running_server_key() == server_key:
+        return
     remove_postgres_container()
     
+    server_args = list(get_server_profile(profile))
+    if track_statements:
+        server_args += ["-c", "shared_preload_libraries=pg_stat_statements"]
+    
+    docker_args = []
+    if profile == "ephemeral":
+        # Seeded images keep their cluster elsewhere (PGDATA=/pgdata), so this only
+        # moves freshly initialised clusters into memory.
+        docker_args = ["--tmpfs", PGDATA_DIR]
+    
     subprocess.run(
         [
             "docker",
@@ -65,34 +458,17 @@ def ensure_postgres_container_running() -> None:
             "-e", "POSTGRES_PASSWORD=test_pass",
             "-e", "POSTGRES_DB=test_db",
             "-p", f"{POSTGRES_PORT}:5432",
+            "--label", f"{SERVER_KEY_LABEL}={server_key}",
+            *docker_args,
             "-d",
-            "postgres:15",
+            image,
+            *server_args,
         ],
         check=True,
         stdout=subprocess.DEVNULL,
     )
     
-    deadline = time.time() + 60
-    while time.time() < deadline:
-        result = subprocess.run(
-            [
-                "docker",
-                "exec",
-                CONTAINER_NAME,
-                "psql",
-                "-U", "test_user",
-                "-d", "postgres",
-                "-c", "SELECT 1;",
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-        )
-        if result.returncode == 0:
-            break
-        time.sleep(2)
-    else:
-        raise RuntimeError("Postgres container not ready within 60 seconds.")
+    wait_for_postgres(CONTAINER_NAME)
     
     result = subprocess.run(
         [
@@ -126,6 +502,22 @@ def ensure_postgres_container_running() -> None:
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
+    
+    if track_statements:
+        subprocess.run(
+            [
+                "docker",
+                "exec",
+                CONTAINER_NAME,
+                "psql",
+                "-U", "test_user",
+                "-d", "test_db",
+                "-c", "CREATE EXTENSION IF NOT EXISTS pg_stat_statements;",
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
 
 
 def stop_postgres_container() -> None:
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import csv
+import hashlib
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from bench.common import REPO_ROOT
+from experiments.data_generator import (
+    DROP_STATEMENTS,
+    SALES_COLUMNS,
+    ensure_dataset_csv,
+    post_load_statements,
+    pre_load_statements,
+    scenario_indexes_enabled,
+)
+from experiments.timings import scenario_from_name
+
+CACHE_FILE = "impact_cache.json"
+# Entries for configurations that have not been run for this long are dropped.
+MAX_AGE_DAYS = 30
+
+EXPERIMENTS_DIR = REPO_ROOT / "experiments"
+HARNESS_DIRS = {
+    "pytest_sqlalchemy": "pytest_sqlalchemy_postgres",
+    "pytest_testcontainers": "pytest_testcontainers_postgres",
+    "pytest_asyncpg": "pytest_asyncpg_postgres",
+    "sql_test_kit": "sql_test_kit_sales_aggregation",
+    "dbt": "dbt_sales_aggregation",
+}
+# Generated or installed files inside a harness directory.
+SKIPPED_DIRS = {"__pycache__", "seeds", "target", "dbt_packages", "logs"}
+# Runner flags that change how a run is measured, not what it checks.
+UNKEYED_ARGS = {
+    "scenario",
+    "n",
+    "warmup",
+    "out_dir",
+    "sample_resources",
+    "profile",
+    "profile_every",
+    "capture_plans",
+    "xdist_workers",
+    "first_iteration",
+    "schedule",
+    "schedule_position",
+    "keep_server",
+    "impact_cache",
+    "force",
+}
+
+
+def add_impact_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--impact-cache",
+        action="store_true",
+        help="skip scenarios whose SQL, harness code, DDL and input data are unchanged since they last passed",
+    )
+    parser.add_argument("--force", action="store_true", help="with --impact-cache, run every scenario anyway")
+
+
+def scenario_source(path: Path, scenario: str) -> bytes | None:
+    """What `scenario` depends on in `path`: None for another scenario's file, and
+    Python modules without the other scenarios' top-level functions."""
+    owner = scenario_from_name(path.stem)
+    if owner and owner != scenario:
+        return None
+    content = path.read_bytes()
+    if path.suffix != ".py":
+        return content
+    tree = ast.parse(content, filename=str(path))
+    tree.body = [
+        node
+        for node in tree.body
+        if not (
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and scenario_from_name(node.name) not in ("", scenario)
+        )
+    ]
+    # The dump leaves out comments and layout, so those edits keep their entries.
+    return ast.dump(tree).encode("utf-8")
+
+
+def harness_sources(tool: str) -> list[Path]:
+    """Shared experiments modules plus every source file of the tool's harness."""
+    harness_dir = EXPERIMENTS_DIR / HARNESS_DIRS[tool]
+    sources = sorted(EXPERIMENTS_DIR.glob("*.py"))
+    for path in sorted(harness_dir.rglob("*")):
+        parts = path.relative_to(harness_dir).parts
+        if (
+            path.is_file()
+            and path.suffix != ".pyc"
+            and not path.name.startswith(".")
+            and not SKIPPED_DIRS.intersection(parts[:-1])
+        ):
+            sources.append(path)
+    return sources
+
+
+class ImpactCache:
+    """Which scenarios last passed against which code and data, in <out-dir>/impact_cache.json.
+
+    An entry is keyed by tool, scenario and the runner's configuration flags, and holds
+    the fingerprint of the scenario's SQL and harness code, the DDL and the input CSVs
+    it ran with, whether it passed, and a digest of the results it returned. A scenario
+    whose entry passed with the current fingerprint can be skipped.
+    """
+
+    def __init__(self, out_dir: Path, tool: str, args: argparse.Namespace) -> None:
+        self.path = out_dir / CACHE_FILE
+        self.tool = tool
+        self.config = {key: value for key, value in sorted(vars(args).items()) if key not in UNKEYED_ARGS}
+        self.config["scenario_indexes"] = scenario_indexes_enabled()
+        self.config_key = hashlib.sha256(json.dumps(self.config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self.state = self._load()
+        self.fingerprints: dict[str, str] = {}
+        self.digests: dict[str, str] = {}
+        self.unstable: set[str] = set()
+        self._inputs_hash: str | None = None
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {"entries": {}, "files": {}}
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        cutoff = time.time() - MAX_AGE_DAYS * 86400
+        state["entries"] = {
+            key: entry for key, entry in state.get("entries", {}).items() if entry["recorded_at"] >= cutoff
+        }
+        state.setdefault("files", {})
+        return state
+
+    def _save(self) -> None:
+        # Hashes of CSVs that were deleted or regenerated elsewhere are no use any more.
+        self.state["files"] = {path: stat for path, stat in self.state["files"].items() if Path(path).exists()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        scratch = self.path.with_suffix(".tmp")
+        with open(scratch, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        scratch.replace(self.path)
+
+    def _file_hash(self, path: Path) -> str:
+        """sha256 of a (large) input file, rehashed only when its size or mtime changes."""
+        stat = path.stat()
+        cached = self.state["files"].get(str(path))
+        if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        sha = hashlib.sha256()
+        with open(path, "rb") as handle:
+            while chunk := handle.read(1 << 20):
+                sha.update(chunk)
+        self.state["files"][str(path)] = [stat.st_size, stat.st_mtime_ns, sha.hexdigest()]
+        return sha.hexdigest()
+
+    def _inputs(self) -> str:
+        """Hash of the input CSVs and the DDL the harnesses run against them."""
+        if self._inputs_hash is None:
+            data_dir = ensure_dataset_csv(self.config["scale"], self.config["data_profile"])
+            with open(data_dir / "sales.csv", newline="", encoding="utf-8") as handle:
+                extra_columns = [column for column in next(csv.reader(handle)) if column not in SALES_COLUMNS]
+            revenue = self.config.get("revenue_mode", "computed")
+            layout = self.config.get("sales_layout", "heap")
+            ddl = [
+                *DROP_STATEMENTS,
+                *pre_load_statements(extra_columns=extra_columns, revenue=revenue, layout=layout),
+                *post_load_statements(indexes=self.config["scenario_indexes"], revenue=revenue, layout=layout),
+            ]
+            sha = hashlib.sha256("\n".join(ddl).encode("utf-8"))
+            for path in sorted(data_dir.glob("*.csv")):
+                sha.update(f"{path.name}:{self._file_hash(path)}".encode("utf-8"))
+            self._inputs_hash = sha.hexdigest()
+        return self._inputs_hash
+
+    def fingerprint(self, scenario: str) -> str:
+        sha = hashlib.sha256(self._inputs().encode("utf-8"))
+        for path in harness_sources(self.tool):
+            content = scenario_source(path, scenario)
+            if content is not None:
+                sha.update(str(path.relative_to(REPO_ROOT)).encode("utf-8") + b"\0" + content + b"\0")
+        return sha.hexdigest()[:16]
+
+    def _key(self, scenario: str) -> str:
+        return f"{self.tool}/{scenario}/{self.config_key}"
+
+    def pending(self, scenarios: list[str], force: bool = False) -> list[str]:
+        """The scenarios to run: changed or failing since their last run, or all of them with force."""
+        pending = []
+        for scenario in scenarios:
+            self.fingerprints[scenario] = self.fingerprint(scenario)
+            key = self._key(scenario)
+            entry = self.state["entries"].get(key)
+            if entry and entry["fingerprint"] != self.fingerprints[scenario]:
+                del self.state["entries"][key]
+                entry = None
+            if force or not entry or not entry["passed"]:
+                pending.append(scenario)
+                continue
+            print(
+                f"{self.tool} {scenario}: unchanged since {entry['recorded']} "
+                f"(results {entry['digest'] or 'not recorded'}), skipped",
+                file=sys.stderr,
+            )
+        self._save()
+        return pending
+
+    def observe(self, records: list[dict]) -> None:
+        """Take the result digests out of one iteration's harness records."""
+        for record in records:
+            if record["name"] != "result":
+                continue
+            scenario = record["scenario"]
+            if self.digests.setdefault(scenario, record["digest"]) != record["digest"]:
+                self.unstable.add(scenario)
+
+    def record(self, scenarios: list[str], passed: bool) -> None:
+        recorded = datetime.utcnow().isoformat(timespec="seconds")
+        for scenario in scenarios:
+            key = self._key(scenario)
+            digest = self.digests.get(scenario, "")
+            previous = self.state["entries"].get(key)
+            if scenario in self.unstable:
+                print(f"{self.tool} {scenario}: results differ between iterations, not cached", file=sys.stderr)
+            elif passed and previous and previous["digest"] and digest and previous["digest"] != digest:
+                print(
+                    f"{self.tool} {scenario}: results changed ({previous['digest']} -> {digest}) "
+                    "with unchanged inputs",
+                    file=sys.stderr,
+                )
+            self.state["entries"][key] = {
+                "fingerprint": self.fingerprints[scenario],
+                "passed": passed and scenario not in self.unstable,
+                "digest": digest,
+                "recorded": recorded,
+                "recorded_at": time.time(),
+                "config": self.config,
+            }
+        self._save()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import pstats
+import shutil
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROFILERS = ["cprofile", "py-spy"]
+PY_SPY_RATE = 100
+MAX_STACK_DEPTH = 64
+
+
+def should_profile(profiler: str | None, phase: str, iteration: int, every: int) -> bool:
+    return bool(profiler) and phase == "measured" and iteration % max(every, 1) == 0
+
+
+def profile_dir(raw_path: Path, tool: str, scenario: str) -> Path:
+    path = raw_path.parent / "profiles" / f"{tool}_{scenario}"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def profile_path(
+    raw_path: Path,
+    tool: str,
+    scenario: str,
+    phase: str,
+    iteration: int,
+    step: str,
+    profiler: str,
+    xdist_workers: int = 1,
+) -> Path:
+    suffix = ".prof" if profiler == "cprofile" else ".collapsed"
+    # The worker count is in the name so an --xdist-workers sweep keeps one file per count.
+    return profile_dir(raw_path, tool, scenario) / f"{phase}_{iteration:03d}_w{xdist_workers}_{step}{suffix}"
+
+
+def profile_command(cmd: list[str], output: Path, profiler: str) -> list[str]:
+    """Wrap cmd so the child runs under the selected profiler."""
+    if profiler == "py-spy":
+        return [
+            "py-spy",
+            "record",
+            "--format", "raw",
+            "--rate", str(PY_SPY_RATE),
+            "--subprocesses",
+            "-o", str(output),
+            "--",
+            *cmd,
+        ]
+
+    if cmd[0] == sys.executable:
+        args = cmd[1:]
+    else:
+        # Console scripts such as dbt are plain Python files; profile the script itself.
+        script = shutil.which(cmd[0])
+        if script is None:
+            raise FileNotFoundError(f"Cannot profile {cmd[0]!r}: executable not found")
+        args = [script, *cmd[1:]]
+    return [sys.executable, "-m", "cProfile", "-o", str(output), *args]
+
+
+def _frame_label(func: tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    label = f"{name} ({Path(filename).name}:{lineno})" if lineno else name
+    return label.replace(";", ":")
+
+
+def collapse_cprofile(path: Path) -> dict[str, int]:
+    """Approximate collapsed stacks (in microseconds) from a cProfile dump.
+
+    cProfile only keeps caller/callee edges, so each function's own time is
+    spread over its call paths in proportion to the cumulative time of every
+    edge on the path, then rescaled so the per-function totals match tottime.
+    """
+    stats = pstats.Stats(str(path)).stats
+    children: dict[tuple, list[tuple[tuple, float]]] = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, edge_ct) in callers.items():
+            children[caller].append((func, edge_ct))
+
+    weights: dict[tuple, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def walk(func: tuple, path: list[str], on_path: set[tuple], share: float) -> None:
+        frames = path + [_frame_label(func)]
+        weights[func][";".join(frames)] += share
+        if len(frames) >= MAX_STACK_DEPTH:
+            return
+        for child, edge_ct in children.get(func, []):
+            child_ct = stats[child][3]
+            if child in on_path or child_ct <= 0:
+                continue
+            child_share = share * min(edge_ct / child_ct, 1.0)
+            if child_share * child_ct * 1_000_000 < 1:
+                continue
+            walk(child, frames, on_path | {child}, child_share)
+
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    # Under `python -m cProfile` the outermost frame is a recursive exec() that
+    # lists itself as a caller, so it never shows up as caller-less.
+    outermost = max(stats, key=lambda func: stats[func][3])
+    if outermost not in roots:
+        roots.append(outermost)
+    for func in roots:
+        walk(func, [], {func}, 1.0)
+
+    stacks: dict[str, int] = defaultdict(int)
+    for func, paths in weights.items():
+        total = sum(paths.values())
+        tottime_us = stats[func][2] * 1_000_000
+        for stack, weight in paths.items():
+            value = int(tottime_us * weight / total)
+            if value > 0:
+                stacks[stack] += value
+    return stacks
+
+
+def read_collapsed(path: Path) -> dict[str, int]:
+    stacks: dict[str, int] = defaultdict(int)
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
+
+
+def profiled_iterations(profiler: str | None, first: int, n: int, every: int) -> list[int]:
+    """The measured iterations of one runner invocation that ran under the profiler."""
+    return [i for i in range(first, first + n) if should_profile(profiler, "measured", i, every)]
+
+
+def merge_profiles(
+    raw_path: Path,
+    tool: str,
+    scenario: str,
+    profiler: str,
+    iterations: list[int],
+    xdist_workers: int = 1,
+) -> Path | None:
+    """Merge this invocation's profiles of tool/scenario at one worker count into a collapsed-stack file.
+
+    Only the given iterations' files count, so profiles left over from earlier runs
+    stay out; and cProfile microseconds are never added to py-spy sample counts.
+    """
+    directory = profile_dir(raw_path, tool, scenario)
+    suffix = ".prof" if profiler == "cprofile" else ".collapsed"
+    prefixes = tuple(f"measured_{iteration:03d}_w{xdist_workers}_" for iteration in iterations)
+    merged: dict[str, int] = defaultdict(int)
+    for path in sorted(directory.iterdir()):
+        if path.suffix != suffix or not path.name.startswith(prefixes):
+            continue
+        stacks = collapse_cprofile(path) if profiler == "cprofile" else read_collapsed(path)
+        for stack, count in stacks.items():
+            merged[stack] += count
+
+    if not merged:
+        return None
+    output = directory.parent / f"{tool}_{scenario}_w{xdist_workers}_{profiler}.collapsed"
+    with output.open("w", encoding="utf-8") as handle:
+        for stack, count in sorted(merged.items()):
+            handle.write(f"{stack} {count}\n")
+    return output
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import threading
+from pathlib import Path
+
+PROC_DIR = Path("/proc")
+# The cursor and clear-screen sequences docker stats writes before each refresh.
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+RESOURCE_COLUMNS = [
+    "cpu_user_ms",
+    "cpu_sys_ms",
+    "peak_rss_kb",
+    "pg_xact_commit",
+    "pg_blks_read",
+    "pg_blks_hit",
+    "pg_tup_inserted",
+    "pg_temp_bytes",
+    "pg_stmt_calls",
+    "pg_stmt_exec_ms",
+    "container_cpu_peak_pct",
+    "container_cpu_mean_pct",
+    "container_mem_peak_mb",
+]
+
+PG_DATABASE_STATS_SQL = (
+    "SELECT xact_commit, blks_read, blks_hit, tup_inserted, temp_bytes "
+    "FROM pg_stat_database WHERE datname = 'test_db';"
+)
+PG_STATEMENTS_STATS_SQL = (
+    "SELECT COALESCE(SUM(calls), 0), COALESCE(SUM(total_exec_time), 0) FROM pg_stat_statements;"
+)
+
+
+def _page_size_kb() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") // 1024
+    except (ValueError, OSError, AttributeError):
+        return 4
+
+
+def _process_tree(root_pid: int) -> list[int]:
+    """Return root_pid and all its live descendants, read from /proc."""
+    children: dict[int, list[int]] = {}
+    for entry in PROC_DIR.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The command name is wrapped in parentheses and may contain spaces.
+        fields = stat[stat.rfind(")") + 2 :].split()
+        children.setdefault(int(fields[1]), []).append(int(entry.name))
+
+    pids = [root_pid]
+    stack = [root_pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            pids.append(child)
+            stack.append(child)
+    return pids
+
+
+def _tree_rss_kb(root_pid: int, page_kb: int) -> int:
+    total = 0
+    for pid in _process_tree(root_pid):
+        try:
+            resident = (PROC_DIR / str(pid) / "statm").read_text().split()[1]
+        except (OSError, IndexError):
+            continue
+        total += int(resident) * page_kb
+    return total
+
+
+def _psql(container: str, sql: str) -> list[str] | None:
+    result = subprocess.run(
+        ["docker", "exec", container, "psql", "-U", "test_user", "-d", "test_db", "-tAF", ",", "-c", sql],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.strip().splitlines()[0].split(",")
+
+
+def _parse_mem_mb(value: str) -> float:
+    units = {"b": 1 / 1024 / 1024, "kib": 1 / 1024, "mib": 1, "gib": 1024, "kb": 1 / 1000, "mb": 1, "gb": 1000}
+    value = value.strip().lower()
+    for suffix in sorted(units, key=len, reverse=True):
+        if value.endswith(suffix):
+            return float(value[: -len(suffix)]) * units[suffix]
+    return 0.0
+
+
+def _parse_stats_line(line: str) -> tuple[float, float] | None:
+    try:
+        cpu, mem = line.split(";")
+        return float(cpu.strip().rstrip("%")), _parse_mem_mb(mem.split("/")[0])
+    except ValueError:
+        return None
+
+
+class ResourceSampler:
+    """Samples client, Postgres and container resource usage while commands run.
+
+    Client CPU comes from wait4() rusage of each command, peak RSS from polling
+    the command's process tree in /proc. Postgres counters are deltas of
+    pg_stat_database and, when the extension is installed, pg_stat_statements in
+    pg_container, read before and after. Container CPU/memory comes from one
+    streaming `docker stats` process (about one refresh a second) for the given
+    containers, or every running container when the list is empty; spawning a
+    `docker stats --no-stream` per sample cost more CPU than it measured. A
+    disabled sampler only runs the commands.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        pg_container: str | None = None,
+        containers: list[str] | None = None,
+        interval: float = 0.1,
+    ) -> None:
+        self.enabled = enabled
+        self.pg_container = pg_container
+        self.containers = containers
+        self.interval = interval
+        self._page_kb = _page_size_kb()
+        self._peak_rss_kb = 0
+        self._cpu_samples: list[float] = []
+        self._mem_peak_mb = 0.0
+        self._stats_proc: subprocess.Popen | None = None
+        self._docker_thread: threading.Thread | None = None
+        self._cpu_user_s = 0.0
+        self._cpu_sys_s = 0.0
+        self._commands = 0
+        self._pg_start: list[str] | None = None
+        self._pg_end: list[str] | None = None
+        self._stmt_start: list[str] | None = None
+        self._stmt_end: list[str] | None = None
+
+    def __enter__(self) -> ResourceSampler:
+        if not self.enabled:
+            return self
+        if self.pg_container:
+            self._pg_start = _psql(self.pg_container, PG_DATABASE_STATS_SQL)
+            self._stmt_start = _psql(self.pg_container, PG_STATEMENTS_STATS_SQL)
+        if self.containers is not None:
+            self._stats_proc = subprocess.Popen(
+                ["docker", "stats", "--format", "{{.CPUPerc}};{{.MemUsage}}", *self.containers],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            self._docker_thread = threading.Thread(target=self._read_docker_stats, daemon=True)
+            self._docker_thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if not self.enabled:
+            return
+        if self._stats_proc:
+            self._stats_proc.terminate()
+            self._stats_proc.wait()
+        if self._docker_thread:
+            self._docker_thread.join()
+        if self.pg_container:
+            self._pg_end = _psql(self.pg_container, PG_DATABASE_STATS_SQL)
+            self._stmt_end = _psql(self.pg_container, PG_STATEMENTS_STATS_SQL)
+
+    def run(self, cmd: list[str], **kwargs) -> subprocess.CompletedProcess:
+        if not self.enabled or not PROC_DIR.is_dir():
+            return subprocess.run(cmd, check=False, **kwargs)
+        proc = subprocess.Popen(cmd, **kwargs)
+        done = threading.Event()
+        rss_thread = threading.Thread(target=self._poll_rss, args=(proc.pid, done), daemon=True)
+        rss_thread.start()
+        # Block in wait4 so the command's exit is seen immediately and its own
+        # rusage (not that of the docker stats helpers) is attributed.
+        _, status, usage = os.wait4(proc.pid, 0)
+        done.set()
+        rss_thread.join()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        self._cpu_user_s += usage.ru_utime
+        self._cpu_sys_s += usage.ru_stime
+        self._commands += 1
+        return subprocess.CompletedProcess(cmd, proc.returncode)
+
+    def _poll_rss(self, pid: int, done: threading.Event) -> None:
+        while not done.is_set():
+            self._peak_rss_kb = max(self._peak_rss_kb, _tree_rss_kb(pid, self._page_kb))
+            done.wait(self.interval)
+
+    def _add_frame(self, frame: tuple[float, float] | None) -> None:
+        if frame is not None:
+            self._cpu_samples.append(frame[0])
+            self._mem_peak_mb = max(self._mem_peak_mb, frame[1])
+
+    def _read_docker_stats(self) -> None:
+        # Each refresh lists every container once; sum them per refresh.
+        frame: tuple[float, float] | None = None
+        for line in self._stats_proc.stdout:
+            if ANSI_ESCAPE.search(line):
+                self._add_frame(frame)
+                frame = None
+                line = ANSI_ESCAPE.sub("", line)
+            parsed = _parse_stats_line(line)
+            if parsed:
+                frame = parsed if frame is None else (frame[0] + parsed[0], frame[1] + parsed[1])
+        self._add_frame(frame)
+
+    def metrics(self) -> dict[str, str]:
+        if not self.enabled or not self._commands:
+            return {}
+        metrics = {
+            "cpu_user_ms": f"{self._cpu_user_s * 1000:.0f}",
+            "cpu_sys_ms": f"{self._cpu_sys_s * 1000:.0f}",
+            "peak_rss_kb": str(self._peak_rss_kb),
+        }
+        if self._pg_start and self._pg_end:
+            deltas = [int(end) - int(start) for start, end in zip(self._pg_start, self._pg_end)]
+            for column, delta in zip(
+                ["pg_xact_commit", "pg_blks_read", "pg_blks_hit", "pg_tup_inserted", "pg_temp_bytes"], deltas
+            ):
+                metrics[column] = str(delta)
+        if self._stmt_start and self._stmt_end:
+            metrics["pg_stmt_calls"] = str(int(self._stmt_end[0]) - int(self._stmt_start[0]))
+            metrics["pg_stmt_exec_ms"] = f"{float(self._stmt_end[1]) - float(self._stmt_start[1]):.3f}"
+        if self._cpu_samples:
+            metrics["container_cpu_peak_pct"] = f"{max(self._cpu_samples):.2f}"
+            metrics["container_cpu_mean_pct"] = f"{sum(self._cpu_samples) / len(self._cpu_samples):.2f}"
+            metrics["container_mem_peak_mb"] = f"{self._mem_peak_mb:.1f}"
+        return metrics
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
+import json
 import os
 import subprocess
 import sys
@@ -9,14 +11,34 @@ from datetime import datetime
 from pathlib import Path
 
 from bench.common import (
+    CONTAINER_NAME,
     REPO_ROOT,
+    add_dataset_args,
+    add_instrumentation_args,
+    add_scenario_arg,
+    add_schedule_args,
+    add_server_profile_arg,
     ensure_postgres_container_running,
     ensure_results_file,
     get_log_file_path,
+    scenario_label,
+    set_run_context,
+    set_dataset_context,
     stop_postgres_container,
     write_log_header,
+    write_query_rows,
     write_run_row,
 )
+from bench.impact_cache import ImpactCache, add_impact_cache_args
+from bench.profiling import (
+    merge_profiles,
+    profile_command,
+    profile_path,
+    profiled_iterations,
+    should_profile,
+)
+from bench.resources import ResourceSampler
+from experiments.timings import scenario_from_name
 
 SELECT_MAP = {
     "S1": "tag:S1",
@@ -28,90 +50,153 @@ SELECT_MAP = {
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--scenario", choices=["S1", "S2", "S4", "S6"], required=True)
+    add_scenario_arg(parser)
     parser.add_argument("--n", type=int, default=30)
     parser.add_argument("--warmup", type=int, default=0)
-    parser.add_argument("--scale", choices=["small", "big"], default="big")
+    add_dataset_args(parser)
     parser.add_argument("--out-dir", default="data/output")
+    add_instrumentation_args(parser)
+    add_schedule_args(parser)
+    add_server_profile_arg(parser)
+    add_impact_cache_args(parser)
     return parser.parse_args()
 
 
+def dbt_test_records(dbt_dir: Path) -> list[dict]:
+    """Per-scenario execution time and result digest of the last `dbt test`, from target/run_results.json.
+
+    A dbt test's result is its status and failing-row count, so that is what the digest covers.
+    """
+    results_path = dbt_dir / "target" / "run_results.json"
+    if not results_path.exists():
+        return []
+    with open(results_path, encoding="utf-8") as f:
+        results = json.load(f).get("results", [])
+    totals: dict[str, float] = {}
+    outcomes: dict[str, list[tuple]] = {}
+    for result in results:
+        scenario = scenario_from_name(result["unique_id"].split(".")[-1])
+        if scenario:
+            totals[scenario] = totals.get(scenario, 0.0) + result["execution_time"] * 1000
+            outcomes.setdefault(scenario, []).append(
+                (result["unique_id"], result["status"], result.get("failures"))
+            )
+    return [
+        {"name": "query", "scenario": scenario, "duration_ms": round(duration_ms, 3)}
+        for scenario, duration_ms in totals.items()
+    ] + [
+        {
+            "name": "result",
+            "scenario": scenario,
+            "digest": hashlib.sha256(repr(sorted(outcome)).encode("utf-8")).hexdigest()[:16],
+        }
+        for scenario, outcome in outcomes.items()
+    ]
+
+
 def invoke_dbt_run(
     repo_root: Path,
     raw_path: Path,
     log_path: Path,
     scenario: str,
-    select_arg: str,
+    select_args: list[str],
     iteration: int,
     phase: str,
-) -> None:
-    start_time = time.perf_counter()
+    sample_resources: bool = False,
+    profiler: str | None = None,
+) -> list[dict]:
+    sampler = ResourceSampler(
+        enabled=sample_resources,
+        pg_container=CONTAINER_NAME,
+        containers=[CONTAINER_NAME],
+    )
     dbt_dir = repo_root / "experiments" / "dbt_sales_aggregation"
-    exit_code = 0
     
-    with open(log_path, "a", encoding="utf-8") as log_file:
+    with open(log_path, "a", encoding="utf-8") as log_file, sampler:
+        
+        def run_step(step: str, cmd: list[str]) -> int:
+            if profiler:
+                output = profile_path(raw_path, "dbt", scenario, phase, iteration, step, profiler)
+                cmd = profile_command(cmd, output, profiler)
+            result = sampler.run(cmd, cwd=repo_root, stdout=log_file, stderr=subprocess.STDOUT)
+            return result.returncode
+        
+        start_time = time.perf_counter()
         write_log_header(log_file, "dbt", scenario, iteration, phase)
         
-        result = subprocess.run(
+        exit_code = run_step(
+            "generate_seeds",
             [sys.executable, str(repo_root / "experiments" / "dbt_sales_aggregation" / "generate_seeds.py")],
-            cwd=repo_root,
-            check=False,
-            stdout=log_file,
-            stderr=subprocess.STDOUT,
         )
-        exit_code = result.returncode
         
         if exit_code == 0:
-            result = subprocess.run(
+            exit_code = run_step(
+                "seed",
                 ["dbt", "seed", "--no-use-colors", "--full-refresh", "--project-dir", str(dbt_dir)],
-                cwd=repo_root,
-                check=False,
-                stdout=log_file,
-                stderr=subprocess.STDOUT,
             )
-            exit_code = result.returncode
         
         if exit_code == 0:
-            result = subprocess.run(
-                ["dbt", "run", "--no-use-colors", "--project-dir", str(dbt_dir)],
-                cwd=repo_root,
-                check=False,
-                stdout=log_file,
-                stderr=subprocess.STDOUT,
-            )
-            exit_code = result.returncode
+            exit_code = run_step("run", ["dbt", "run", "--no-use-colors", "--project-dir", str(dbt_dir)])
         
         if exit_code == 0:
             cmd = ["dbt", "test", "--no-use-colors", "--project-dir", str(dbt_dir)]
-            if select_arg:
-                cmd.extend(["--select", select_arg])
-            result = subprocess.run(cmd, cwd=repo_root, check=False, stdout=log_file, stderr=subprocess.STDOUT)
-            exit_code = result.returncode
+            if select_args:
+                cmd.extend(["--select", *select_args])
+            exit_code = run_step("test", cmd)
+        
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
     
-    elapsed_ms = int((time.perf_counter() - start_time) * 1000)
-    write_run_row(raw_path, "dbt", scenario, iteration, phase, elapsed_ms, exit_code)
+    write_run_row(
+        raw_path,
+        "dbt",
+        scenario,
+        iteration,
+        phase,
+        elapsed_ms,
+        exit_code,
+        {**sampler.metrics(), "profiler": profiler or ""},
+    )
+    records = dbt_test_records(dbt_dir) if exit_code == 0 else []
+    write_query_rows(raw_path, "dbt", records, iteration, phase, exit_code, {"profiler": profiler or ""})
     
     if exit_code != 0:
         raise RuntimeError(f"dbt failed for {scenario} ({phase}/{iteration})")
 
+    return records
+
 
 def main() -> None:
     args = parse_args()
     os.chdir(REPO_ROOT)
+    cache = None
+    if args.impact_cache:
+        cache = ImpactCache(REPO_ROOT / args.out_dir, "dbt", args)
+        args.scenario = cache.pending(args.scenario, force=args.force)
+        if not args.scenario:
+            return
+        os.environ["BENCH_RESULT_DIGESTS"] = "1"
+    scenario = scenario_label(args.scenario)
     
-    os.environ["DATA_SCALE"] = args.scale
+    set_dataset_context(args.scale, args.data_profile)
+    set_run_context(schedule=args.schedule, schedule_position=args.schedule_position)
     os.environ["DBT_PROFILES_DIR"] = str(REPO_ROOT / "experiments" / "dbt_sales_aggregation" / "profiles")
     os.environ["DBT_USE_COLORS"] = "false"
     
     raw_path = REPO_ROOT / args.out_dir / "raw_runs.csv"
     ensure_results_file(raw_path)
     
-    log_path = get_log_file_path("dbt", args.scenario)
-    select_arg = SELECT_MAP[args.scenario]
+    log_path = get_log_file_path("dbt", scenario)
+    # One `dbt test` selecting the union of the scenario tags.
+    select_args = [SELECT_MAP[item] for item in args.scenario]
     dbt_dir = REPO_ROOT / "experiments" / "dbt_sales_aggregation"
     
+    passed = False
     try:
-        ensure_postgres_container_running()
+        # dbt always (re)loads through `dbt seed`, so it runs on the stock image.
+        set_run_context(image="postgres:15", server_profile=args.server_profile)
+        ensure_postgres_container_running(
+            track_statements=args.sample_resources, profile=args.server_profile, reuse=args.keep_server
+        )
         
         with open(log_path, "a", encoding="utf-8") as log_file:
             log_file.write(f"dbt deps started at {datetime.now().isoformat()}\n")
@@ -125,12 +210,36 @@ def main() -> None:
             )
         
         for i in range(1, args.warmup + 1):
-            invoke_dbt_run(REPO_ROOT, raw_path, log_path, args.scenario, select_arg, i, "warmup")
+            records = invoke_dbt_run(
+                REPO_ROOT, raw_path, log_path, scenario, select_args, i, "warmup",
+                sample_resources=args.sample_resources,
+            )
+            if cache:
+                cache.observe(records)
         
-        for i in range(1, args.n + 1):
-            invoke_dbt_run(REPO_ROOT, raw_path, log_path, args.scenario, select_arg, i, "measured")
+        for i in range(args.first_iteration, args.first_iteration + args.n):
+            records = invoke_dbt_run(
+                REPO_ROOT, raw_path, log_path, scenario, select_args, i, "measured",
+                sample_resources=args.sample_resources,
+                profiler=args.profile if should_profile(args.profile, "measured", i, args.profile_every) else None,
+            )
+            if cache:
+                cache.observe(records)
+        
+        if args.profile:
+            merge_profiles(
+                raw_path,
+                "dbt",
+                scenario,
+                args.profile,
+                profiled_iterations(args.profile, args.first_iteration, args.n, args.profile_every),
+            )
+        passed = True
     finally:
-        stop_postgres_container()
+        if cache:
+            cache.record(args.scenario, passed)
+        if not args.keep_server:
+            stop_postgres_container()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+
+from bench.common import REPO_ROOT
+
+# What each harness subprocess imports before it can do any work.
+HARNESS_IMPORTS = {
+    "pytest_sqlalchemy": [
+        "pytest",
+        "experiments.pytest_sqlalchemy_postgres.conftest",
+        "experiments.pytest_sqlalchemy_postgres.test_postgres",
+    ],
+    "pytest_testcontainers": [
+        "pytest",
+        "experiments.pytest_testcontainers_postgres.conftest",
+        "experiments.pytest_testcontainers_postgres.test_container_postgres",
+    ],
+    "pytest_asyncpg": [
+        "pytest",
+        "experiments.pytest_asyncpg_postgres.conftest",
+        "experiments.pytest_asyncpg_postgres.test_asyncpg_postgres",
+    ],
+    "sql_test_kit": ["experiments.sql_test_kit_sales_aggregation.main_test"],
+    "dbt": ["dbt.cli.main"],
+}
+
+# Heavy modules each harness must only load on the path that uses them. SQLAlchemy
+# loads its dialect and DBAPI driver at create_engine(); the ORM harness still maps
+# its models, and so loads sqlalchemy.orm, at import.
+DEFERRED_IMPORTS = {
+    "pytest_sqlalchemy": ["sqlalchemy.dialects.postgresql", "psycopg2", "psycopg"],
+    "pytest_testcontainers": [
+        "testcontainers",
+        "docker",
+        "sqlalchemy.orm",
+        "sqlalchemy.dialects.postgresql",
+        "psycopg2",
+        "psycopg",
+    ],
+    "pytest_asyncpg": ["asyncpg"],
+    "sql_test_kit": ["pandas", "sql_test_kit", "psycopg2"],
+}
+
+# Target warm import time of each harness's own modules (what it adds on top of pytest),
+# in ms on a typical developer machine. bench/test_import_budget.py fails above it;
+# multiply with IMPORT_BUDGET_SCALE on slower machines.
+IMPORT_BUDGET_MS = {
+    "pytest_sqlalchemy": 250,
+    "pytest_testcontainers": 150,
+    "pytest_asyncpg": 60,
+    "sql_test_kit": 60,
+}
+
+BASELINE = "interpreter"
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S.*)$")
+
+RAW_FIELDS = ["timestamp", "tool", "mode", "iteration", "wall_ms", "import_ms", "exit_code"]
+SUMMARY_FIELDS = [
+    "tool",
+    "mode",
+    "n",
+    "median_wall_ms",
+    "median_import_ms",
+    "startup_overhead_ms",
+    "heaviest_chains",
+]
+
+
+@dataclass
+class ImportNode:
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: list[ImportNode] = field(default_factory=list)
+
+
+def parse_importtime(stderr: str) -> list[ImportNode]:
+    """Build the import tree from `-X importtime` output (printed in post-order)."""
+    pending: dict[int, list[ImportNode]] = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        level = len(indent) // 2
+        node = ImportNode(name.strip(), int(self_us), int(cumulative_us), pending.pop(level + 1, []))
+        pending.setdefault(level, []).append(node)
+    return pending.get(0, [])
+
+
+def heaviest_chain(node: ImportNode) -> list[ImportNode]:
+    chain = [node]
+    while chain[-1].children:
+        chain.append(max(chain[-1].children, key=lambda child: child.cumulative_us))
+    return chain
+
+
+def format_chain(chain: list[ImportNode]) -> str:
+    return " > ".join(f"{node.name}({node.cumulative_us / 1000:.0f}ms)" for node in chain)
+
+
+def imported_names(roots: list[ImportNode]) -> set[str]:
+    names = set()
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        names.add(node.name)
+        stack.extend(node.children)
+    return names
+
+
+def print_comparison(previous_path: Path, summary_rows: list[dict]) -> None:
+    with previous_path.open(newline="", encoding="utf-8") as handle:
+        previous = {(row["tool"], row["mode"]): row for row in csv.DictReader(handle)}
+    headers = ["tool", "mode", "before_wall_ms", "after_wall_ms", "delta_ms", "delta_pct"]
+    print("| " + " | ".join(headers) + " |")
+    print("| " + " | ".join(["---"] * len(headers)) + " |")
+    for row in summary_rows:
+        before = previous.get((row["tool"], row["mode"]))
+        if not before:
+            continue
+        before_ms = float(before["median_wall_ms"])
+        after_ms = float(row["median_wall_ms"])
+        delta = after_ms - before_ms
+        pct = delta / before_ms * 100 if before_ms else 0.0
+        print(f"| {row['tool']} | {row['mode']} | {before_ms:.3f} | {after_ms:.3f} | {delta:.3f} | {pct:.1f} |")
+
+
+def measure(statement: str, pycache_prefix: Path) -> tuple[float, list[ImportNode], int]:
+    env = {**os.environ, "PYTHONPYCACHEPREFIX": str(pycache_prefix)}
+    start_time = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    wall_ms = (time.perf_counter() - start_time) * 1000
+    return wall_ms, parse_importtime(result.stderr), result.returncode
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tools", nargs="+", choices=list(HARNESS_IMPORTS), default=list(HARNESS_IMPORTS))
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--cold", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--out-dir", default="data/output")
+    parser.add_argument("--compare-to", type=Path, default=None, help="previous import_summary.csv")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    os.chdir(REPO_ROOT)
+
+    out_dir = REPO_ROOT / args.out_dir
+    out_dir.mkdir(parents=True, exist_ok=True)
+    raw_rows = []
+    summary_rows = []
+    baseline_ms: dict[str, float] = {}
+
+    targets = {BASELINE: "pass"}
+    targets.update({tool: "import " + ", ".join(HARNESS_IMPORTS[tool]) for tool in args.tools})
+
+    for tool, statement in targets.items():
+        for mode, runs in (("cold", args.cold), ("warm", args.n)):
+            walls = []
+            imports = []
+            roots: list[ImportNode] = []
+            with tempfile.TemporaryDirectory(prefix="importtime_") as tmp:
+                if mode == "warm":
+                    # Populate the bytecode cache once; every measured run reuses it.
+                    measure(statement, Path(tmp))
+                for i in range(1, runs + 1):
+                    if mode == "cold":
+                        # A fresh pycache prefix forces every module to be recompiled.
+                        prefix = Path(tmp) / f"run_{i}"
+                    else:
+                        prefix = Path(tmp)
+                    wall_ms, roots, exit_code = measure(statement, prefix)
+                    import_ms = sum(node.cumulative_us for node in roots) / 1000
+                    raw_rows.append(
+                        {
+                            "timestamp": datetime.utcnow().isoformat(),
+                            "tool": tool,
+                            "mode": mode,
+                            "iteration": i,
+                            "wall_ms": f"{wall_ms:.3f}",
+                            "import_ms": f"{import_ms:.3f}",
+                            "exit_code": exit_code,
+                        }
+                    )
+                    if exit_code != 0:
+                        print(f"{tool}: import failed ({mode}/{i}); is the harness installed?", file=sys.stderr)
+                        continue
+                    walls.append(wall_ms)
+                    imports.append(import_ms)
+
+            if not walls:
+                continue
+            if tool == BASELINE:
+                baseline_ms[mode] = median(walls)
+            chains = [format_chain(heaviest_chain(node)) for node in sorted(roots, key=lambda n: -n.cumulative_us)]
+            summary_rows.append(
+                {
+                    "tool": tool,
+                    "mode": mode,
+                    "n": len(walls),
+                    "median_wall_ms": f"{median(walls):.3f}",
+                    "median_import_ms": f"{median(imports):.3f}",
+                    "startup_overhead_ms": f"{median(walls) - baseline_ms.get(mode, 0.0):.3f}",
+                    "heaviest_chains": " | ".join(chains[: args.top]),
+                }
+            )
+
+    if args.compare_to is None and (out_dir / "import_summary.csv").exists():
+        args.compare_to = out_dir / "import_summary.prev.csv"
+        (out_dir / "import_summary.csv").replace(args.compare_to)
+
+    raw_path = out_dir / "import_times.csv"
+    write_header = not raw_path.exists()
+    with raw_path.open("a", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=RAW_FIELDS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(raw_rows)
+
+    with (out_dir / "import_summary.csv").open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summary_rows)
+
+    headers = SUMMARY_FIELDS[:-1]
+    print("| " + " | ".join(headers) + " |")
+    print("| " + " | ".join(["---"] * len(headers)) + " |")
+    for row in summary_rows:
+        print("| " + " | ".join(str(row[h]) for h in headers) + " |")
+    if args.compare_to and args.compare_to.exists():
+        print("\nBefore/after:")
+        print_comparison(args.compare_to, summary_rows)
+    for row in summary_rows:
+        if row["mode"] == "warm" and row["tool"] != BASELINE:
+            print(f"\n{row['tool']} heaviest import chains:")
+            for chain in row["heaviest_chains"].split(" | "):
+                print(f"  {chain}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+from datetime import datetime
+
+from bench.common import REPO_ROOT, add_dataset_args, cleanup_testcontainers, parse_scenarios, stop_postgres_container
+from bench.run_scale_sweep import RUNNERS
+from experiments.data_generator import ensure_dataset_csv
+
+ORDERS = ["latin", "random", "blocked"]
+
+
+def parse_args() -> tuple[argparse.Namespace, list[str]]:
+    parser = argparse.ArgumentParser(
+        description="Run the measured iterations of every tool x scenario cell interleaved, one per "
+        "runner invocation, in a seeded order; extra arguments go to each runner."
+    )
+    parser.add_argument("--tools", nargs="+", choices=list(RUNNERS), default=list(RUNNERS))
+    parser.add_argument("--scenario", type=parse_scenarios, default=parse_scenarios("all"))
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1,
+        help="warm-up iterations per cell before the schedule, on the server the cell's slots then run on",
+    )
+    add_dataset_args(parser)
+    parser.add_argument("--out-dir", default="data/output")
+    parser.add_argument(
+        "--order",
+        choices=ORDERS,
+        default="latin",
+        help="latin: each round runs every cell once, in the rows of a Williams Latin square "
+        "(every cell in every position, and after every other cell, equally often); "
+        "random: a seeded shuffle of all iterations; blocked: all iterations of a cell in a row",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args, runner_args = parser.parse_known_args()
+    if "--impact-cache" in runner_args:
+        # Every slot is a separate invocation, so the cache would skip all but the first.
+        parser.error("--impact-cache does not apply to interleaved runs")
+    return args, runner_args
+
+
+def williams_rows(k: int) -> list[list[int]]:
+    """Rows of a Williams design for k treatments: k rows for even k, 2k for odd k."""
+    first = [0]
+    low, high = 1, k - 1
+    while len(first) < k:
+        first.append(low)
+        low += 1
+        if len(first) < k:
+            first.append(high)
+            high -= 1
+    rows = [[(cell + shift) % k for cell in first] for shift in range(k)]
+    if k % 2:
+        rows += [row[::-1] for row in rows]
+    return rows
+
+
+def build_schedule(
+    cells: list[tuple[str, str]], n: int, order: str, seed: int
+) -> list[tuple[str, str, int]]:
+    """(tool, scenario, iteration) in the order to run them; iterations count up per cell."""
+    rng = random.Random(seed)
+    if order == "blocked":
+        sequence = [cell for cell in cells for _ in range(n)]
+    elif order == "random":
+        sequence = [cell for cell in cells for _ in range(n)]
+        rng.shuffle(sequence)
+    else:
+        cells = rng.sample(cells, len(cells))
+        rows = williams_rows(len(cells))
+        sequence = [cells[index] for round_ in range(n) for index in rows[round_ % len(rows)]]
+
+    counts: dict[tuple[str, str], int] = {}
+    schedule = []
+    for cell in sequence:
+        counts[cell] = counts.get(cell, 0) + 1
+        schedule.append((*cell, counts[cell]))
+    return schedule
+
+
+def runner_command(tool: str, scenario: str, args: argparse.Namespace, runner_args: list[str]) -> list[str]:
+    return [
+        sys.executable,
+        "-m",
+        RUNNERS[tool],
+        "--scenario", scenario,
+        "--scale", args.scale,
+        "--data-profile", args.data_profile,
+        "--out-dir", args.out_dir,
+        "--keep-server",
+        *runner_args,
+    ]
+
+
+def main() -> None:
+    args, runner_args = parse_args()
+    os.chdir(REPO_ROOT)
+
+    cells = [(tool, scenario) for tool in args.tools for scenario in args.scenario]
+    schedule = build_schedule(cells, args.n, args.order, args.seed)
+    label = f"{args.order}:{args.seed}:{datetime.utcnow():%Y%m%dT%H%M%S}"
+
+    # Done once up front: the dataset CSVs, and a warm-up block per cell. Every invocation
+    # runs with --keep-server, so the warm-up and all slots share one running server and
+    # measured slots see the same warm server a normal run's iterations do. Only a tool
+    # that needs a differently configured server (another image, profile or
+    # pg_stat_statements) restarts it when the schedule switches to it.
+    ensure_dataset_csv(args.scale, args.data_profile)
+    failures = []
+    try:
+        if args.warmup:
+            for tool, scenario in cells:
+                print(f"== warmup {tool} {scenario}", flush=True)
+                cmd = [*runner_command(tool, scenario, args, runner_args), "--n", "0", "--warmup", str(args.warmup)]
+                result = subprocess.run(cmd, cwd=REPO_ROOT, check=False)
+                if result.returncode != 0:
+                    failures.append(f"warmup {tool} {scenario} (exit {result.returncode})")
+
+        for position, (tool, scenario, iteration) in enumerate(schedule, start=1):
+            print(f"== {label} {position}/{len(schedule)}: {tool} {scenario} #{iteration}", flush=True)
+            cmd = [
+                *runner_command(tool, scenario, args, runner_args),
+                "--n", "1",
+                "--warmup", "0",
+                "--first-iteration", str(iteration),
+                "--schedule", label,
+                "--schedule-position", str(position),
+            ]
+            # A failing slot is reported at the end; the rest of the schedule still runs.
+            result = subprocess.run(cmd, cwd=REPO_ROOT, check=False)
+            if result.returncode != 0:
+                failures.append(f"{tool} {scenario} #{iteration} at {position} (exit {result.returncode})")
+    finally:
+        cleanup_testcontainers()
+        stop_postgres_container()
+
+    if failures:
+        print("Failed runs:\n  " + "\n  ".join(failures), file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
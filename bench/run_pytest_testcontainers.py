@@ -5,17 +5,47 @@ import os
 import subprocess
 import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 from bench.common import (
     REPO_ROOT,
+    add_dataset_args,
+    add_delta_rows_arg,
+    add_instrumentation_args,
+    add_load_workers_arg,
+    add_prepared_statements_arg,
+    add_revenue_mode_arg,
+    add_sales_layout_arg,
+    add_scenario_arg,
+    add_schedule_args,
+    add_server_profile_arg,
+    add_xdist_workers_arg,
     cleanup_testcontainers,
+    collect_harness_timings,
     ensure_results_file,
     get_log_file_path,
+    reset_harness_timings,
+    scenario_label,
+    set_run_context,
+    set_dataset_context,
     stop_postgres_container,
     write_log_header,
+    write_query_rows,
     write_run_row,
+    xdist_args,
 )
+from bench.build_seeded_image import build_seeded_image
+from bench.impact_cache import ImpactCache, add_impact_cache_args
+from bench.profiling import (
+    merge_profiles,
+    profile_command,
+    profile_path,
+    profiled_iterations,
+    should_profile,
+)
+from bench.resources import ResourceSampler
+from experiments.data_generator import scenario_indexes_enabled
 
 SCENARIO_MAP = {
     "S1": "test_s1_monthly_sum_equals_total",
@@ -27,12 +57,68 @@ SCENARIO_MAP = {
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--scenario", choices=["S1", "S2", "S4", "S6"], required=True)
+    add_scenario_arg(parser)
     parser.add_argument("--n", type=int, default=30)
     parser.add_argument("--warmup", type=int, default=0)
-    parser.add_argument("--scale", choices=["small", "big"], default="big")
+    add_dataset_args(parser)
     parser.add_argument("--out-dir", default="data/output")
-    return parser.parse_args()
+    add_instrumentation_args(parser)
+    add_schedule_args(parser)
+    add_server_profile_arg(parser)
+    add_load_workers_arg(parser)
+    add_xdist_workers_arg(parser)
+    add_delta_rows_arg(parser)
+    add_revenue_mode_arg(parser)
+    add_sales_layout_arg(parser)
+    add_prepared_statements_arg(parser)
+    parser.add_argument("--capture-plans", action="store_true")
+    parser.add_argument(
+        "--reuse",
+        choices=["off", "session", "cross"],
+        default="off",
+        help="off: a container per test; session: one per pytest process; cross: one kept "
+        "running across iterations, removed when the runner exits",
+    )
+    parser.add_argument("--seeded", action="store_true", help="start from a pre-seeded image")
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="start each iteration's container while the previous iteration runs, outside its "
+        "timed window; rows are recorded with pipeline=1",
+    )
+    add_impact_cache_args(parser)
+    args = parser.parse_args()
+    if args.pipeline and args.reuse != "off":
+        parser.error("--pipeline starts a container per iteration; it does not combine with --reuse")
+    return args
+
+
+class ContainerPipeline:
+    """Containers for successive iterations, each started while the one before it runs."""
+
+    def __init__(self, image: str, profile: str) -> None:
+        self.image = image
+        self.profile = profile
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending: Future | None = None
+
+    def _start(self):
+        # Imported here so runs without --pipeline never load testcontainers in this process.
+        from experiments.pytest_testcontainers_postgres.containers import ReadyPostgresContainer
+
+        return ReadyPostgresContainer(image=self.image, profile=self.profile).start()
+
+    def take(self, prepare_next: bool):
+        """The ready container for this iteration; with prepare_next, the next one starts now."""
+        container = self.pending.result() if self.pending else self._start()
+        self.pending = self.executor.submit(self._start) if prepare_next else None
+        return container
+
+    def close(self) -> None:
+        # A start that failed leaves nothing to stop; cleanup_testcontainers catches any leftovers.
+        if self.pending and self.pending.exception() is None:
+            self.pending.result().stop()
+        self.executor.shutdown()
 
 
 def invoke_test_run(
@@ -43,56 +129,172 @@ def invoke_test_run(
     filter_name: str,
     iteration: int,
     phase: str,
-) -> None:
-    start_time = time.perf_counter()
+    sample_resources: bool = False,
+    profiler: str | None = None,
+    xdist_workers: int = 1,
+) -> list[dict]:
+    # The container only lives inside the pytest process, so there is no
+    # pg_stat_database baseline to diff against; container stats still apply.
+    # The containers start inside pytest, so the stats cover every running container;
+    # with --pipeline, that includes the next iteration's container starting up.
+    sampler = ResourceSampler(enabled=sample_resources, containers=[])
+    
+    reset_harness_timings(raw_path)
     
-    with open(log_path, "a", encoding="utf-8") as log_file:
+    with open(log_path, "a", encoding="utf-8") as log_file, sampler:
+        start_time = time.perf_counter()
         write_log_header(log_file, "pytest_testcontainers", scenario, iteration, phase)
         
-        result = subprocess.run(
-            [
-                sys.executable,
-                "-m",
-                "pytest",
-                "-q",
-                str(repo_root / "experiments" / "pytest_testcontainers_postgres" / "test_container_postgres.py"),
-                "-k",
-                filter_name,
-            ],
+        cmd = [
+            sys.executable,
+            "-m",
+            "pytest",
+            "-q",
+            str(repo_root / "experiments" / "pytest_testcontainers_postgres" / "test_container_postgres.py"),
+            "-k",
+            filter_name,
+            *xdist_args(xdist_workers),
+        ]
+        if profiler:
+            output = profile_path(
+                raw_path, "pytest_testcontainers", scenario, phase, iteration, "pytest", profiler, xdist_workers
+            )
+            cmd = profile_command(cmd, output, profiler)
+        result = sampler.run(
+            cmd,
             cwd=repo_root,
-            check=False,
             stdout=log_file,
             stderr=subprocess.STDOUT,
         )
+        
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
     
-    elapsed_ms = int((time.perf_counter() - start_time) * 1000)
-    write_run_row(raw_path, "pytest_testcontainers", scenario, iteration, phase, elapsed_ms, result.returncode)
+    write_run_row(
+        raw_path,
+        "pytest_testcontainers",
+        scenario,
+        iteration,
+        phase,
+        elapsed_ms,
+        result.returncode,
+        {**sampler.metrics(), "profiler": profiler or ""},
+    )
+    records = collect_harness_timings(raw_path, "pytest_testcontainers", scenario, iteration, phase, profiler or "")
+    write_query_rows(
+        raw_path, "pytest_testcontainers", records, iteration, phase, result.returncode, {"profiler": profiler or ""}
+    )
     
     if result.returncode != 0:
         raise RuntimeError(f"pytest_testcontainers failed for {scenario} ({phase}/{iteration})")
 
+    return records
+
 
 def main() -> None:
     args = parse_args()
     os.chdir(REPO_ROOT)
+    cache = None
+    if args.impact_cache:
+        cache = ImpactCache(REPO_ROOT / args.out_dir, "pytest_testcontainers", args)
+        args.scenario = cache.pending(args.scenario, force=args.force)
+        if not args.scenario:
+            return
+        os.environ["BENCH_RESULT_DIGESTS"] = "1"
+    scenario = scenario_label(args.scenario)
+    if len(args.scenario) > 1:
+        os.environ["LOAD_ONCE"] = "1"
     
-    os.environ["DATA_SCALE"] = args.scale
+    set_dataset_context(args.scale, args.data_profile)
+    set_run_context(schedule=args.schedule, schedule_position=args.schedule_position)
+    if args.capture_plans:
+        os.environ["CAPTURE_PLANS"] = "1"
+    set_run_context(capture_plans="1" if args.capture_plans else "0")
+    os.environ["TC_REUSE"] = args.reuse
+    image = "postgres:15"
+    if args.seeded:
+        image = build_seeded_image(
+            args.scale,
+            revenue=args.revenue_mode,
+            layout=args.sales_layout,
+            indexes=scenario_indexes_enabled(),
+        )
+        os.environ["DATA_PRELOADED"] = "1"
+    os.environ["PG_IMAGE"] = image
+    os.environ["PG_PROFILE"] = args.server_profile
+    os.environ["LOAD_WORKERS"] = str(args.load_workers)
+    os.environ["DATA_DELTA_ROWS"] = str(args.delta_rows)
+    os.environ["REVENUE_MODE"] = args.revenue_mode
+    os.environ["SALES_LAYOUT"] = args.sales_layout
+    os.environ["PREPARED_STATEMENTS"] = "1" if args.prepared_statements else ""
+    set_run_context(
+        image=image,
+        server_profile=args.server_profile,
+        load_workers=str(args.load_workers),
+        delta_rows=str(args.delta_rows),
+        revenue_mode=args.revenue_mode,
+        sales_layout=args.sales_layout,
+        prepared_statements="1" if args.prepared_statements else "0",
+        pipeline="1" if args.pipeline else "0",
+    )
     
     raw_path = REPO_ROOT / args.out_dir / "raw_runs.csv"
     ensure_results_file(raw_path)
     
-    log_path = get_log_file_path("pytest_testcontainers", args.scenario)
-    filter_name = SCENARIO_MAP[args.scenario]
+    log_path = get_log_file_path("pytest_testcontainers", scenario)
+    filter_name = " or ".join(SCENARIO_MAP[item] for item in args.scenario)
     
+    runs = [
+        (workers, phase, i)
+        for workers in args.xdist_workers
+        for phase, iterations in (
+            ("warmup", range(1, args.warmup + 1)),
+            ("measured", range(args.first_iteration, args.first_iteration + args.n)),
+        )
+        for i in iterations
+    ]
+    pipeline = ContainerPipeline(image, args.server_profile) if args.pipeline else None
+    passed = False
     try:
-        for i in range(1, args.warmup + 1):
-            invoke_test_run(REPO_ROOT, raw_path, log_path, args.scenario, filter_name, i, "warmup")
+        for index, (workers, phase, i) in enumerate(runs):
+            set_run_context(xdist_workers=str(workers))
+            container = None
+            if pipeline:
+                # Started before the timed window; the next iteration's starts alongside this one.
+                container = pipeline.take(prepare_next=index + 1 < len(runs))
+                os.environ["TC_PIPELINE_CONTAINER"] = container.get_wrapped_container().id
+            try:
+                records = invoke_test_run(
+                    REPO_ROOT, raw_path, log_path, scenario, filter_name, i, phase,
+                    sample_resources=args.sample_resources,
+                    xdist_workers=workers,
+                    profiler=args.profile if should_profile(args.profile, phase, i, args.profile_every) else None,
+                )
+            finally:
+                if container:
+                    container.stop()
+            if cache:
+                cache.observe(records)
         
-        for i in range(1, args.n + 1):
-            invoke_test_run(REPO_ROOT, raw_path, log_path, args.scenario, filter_name, i, "measured")
+        if args.profile:
+            for workers in args.xdist_workers:
+                merge_profiles(
+                    raw_path,
+                    "pytest_testcontainers",
+                    scenario,
+                    args.profile,
+                    profiled_iterations(args.profile, args.first_iteration, args.n, args.profile_every),
+                    workers,
+                )
+        passed = True
     finally:
-        cleanup_testcontainers()
-        stop_postgres_container()
+        if pipeline:
+            pipeline.close()
+        if cache:
+            cache.record(args.scenario, passed)
+        # With --keep-server, a --reuse cross container stays up for the next invocation.
+        if not args.keep_server:
+            cleanup_testcontainers()
+            stop_postgres_container()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+from bench.common import REPO_ROOT
+from experiments.data_generator import DISTRIBUTION_PROFILES, SWEEP_SCALES, ensure_dataset_csv
+
+RUNNERS = {
+    "pytest_sqlalchemy": "bench.run_pytest_sqlalchemy",
+    "pytest_testcontainers": "bench.run_pytest_testcontainers",
+    "pytest_asyncpg": "bench.run_pytest_asyncpg",
+    "sql_test_kit": "bench.run_sql_test_kit",
+    "dbt": "bench.run_dbt",
+}
+
+
+def parse_args() -> tuple[argparse.Namespace, list[str]]:
+    parser = argparse.ArgumentParser(
+        description="Run every tool at geometric dataset sizes; extra arguments go to each runner."
+    )
+    parser.add_argument("--tools", nargs="+", choices=list(RUNNERS), default=list(RUNNERS))
+    parser.add_argument("--scales", nargs="+", choices=list(SWEEP_SCALES), default=list(SWEEP_SCALES))
+    parser.add_argument("--scenario", default="all")
+    parser.add_argument("--data-profile", choices=list(DISTRIBUTION_PROFILES), default="uniform")
+    parser.add_argument("--n", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--out-dir", default="data/output")
+    parser.add_argument("--regenerate", action="store_true", help="rewrite existing sweep datasets")
+    return parser.parse_known_args()
+
+
+def main() -> None:
+    args, runner_args = parse_args()
+    os.chdir(REPO_ROOT)
+
+    failures = []
+    for scale in args.scales:
+        print(f"Preparing {scale} ({args.data_profile}) dataset", flush=True)
+        ensure_dataset_csv(scale, args.data_profile, regenerate=args.regenerate)
+        for tool in args.tools:
+            print(f"== {tool} @ {scale}", flush=True)
+            cmd = [
+                sys.executable,
+                "-m",
+                RUNNERS[tool],
+                "--scenario", args.scenario,
+                "--scale", scale,
+                "--data-profile", args.data_profile,
+                "--n", str(args.n),
+                "--warmup", str(args.warmup),
+                "--out-dir", args.out_dir,
+                *runner_args,
+            ]
+            # One tool failing (e.g. running out of memory at 10m) should not end the sweep.
+            result = subprocess.run(cmd, cwd=REPO_ROOT, check=False)
+            if result.returncode != 0:
+                failures.append(f"{tool} @ {scale} (exit {result.returncode})")
+
+    if failures:
+        print("Failed runs:\n  " + "\n  ".join(failures), file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
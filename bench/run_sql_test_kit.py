@@ -8,23 +8,60 @@ import time
 from pathlib import Path
 
 from bench.common import (
+    CONTAINER_NAME,
     REPO_ROOT,
+    add_dataset_args,
+    add_delta_rows_arg,
+    add_instrumentation_args,
+    add_load_workers_arg,
+    add_revenue_mode_arg,
+    add_sales_layout_arg,
+    add_scenario_arg,
+    add_schedule_args,
+    add_server_profile_arg,
+    collect_harness_timings,
     ensure_postgres_container_running,
     ensure_results_file,
     get_log_file_path,
+    reset_harness_timings,
+    scenario_label,
+    set_run_context,
+    set_dataset_context,
     stop_postgres_container,
     write_log_header,
+    write_query_rows,
     write_run_row,
 )
+from bench.build_seeded_image import build_seeded_image
+from bench.impact_cache import ImpactCache, add_impact_cache_args
+from bench.profiling import (
+    merge_profiles,
+    profile_command,
+    profile_path,
+    profiled_iterations,
+    should_profile,
+)
+from bench.resources import ResourceSampler
+from experiments.data_generator import scenario_indexes_enabled
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--scenario", choices=["S1", "S2", "S4", "S6"], required=True)
+    add_scenario_arg(parser)
     parser.add_argument("--n", type=int, default=30)
     parser.add_argument("--warmup", type=int, default=0)
-    parser.add_argument("--scale", choices=["small", "big"], default="big")
+    add_dataset_args(parser)
     parser.add_argument("--out-dir", default="data/output")
+    add_instrumentation_args(parser)
+    add_schedule_args(parser)
+    add_server_profile_arg(parser)
+    add_load_workers_arg(parser)
+    add_delta_rows_arg(parser)
+    add_revenue_mode_arg(parser)
+    add_sales_layout_arg(parser)
+    parser.add_argument("--capture-plans", action="store_true")
+    parser.add_argument("--seeded", action="store_true", help="start from a pre-seeded image")
+    add_impact_cache_args(parser)
     return parser.parse_args()
 
 
@@ -35,52 +72,142 @@ def invoke_sql_test_kit_run(
     scenario: str,
     iteration: int,
     phase: str,
-) -> None:
-    start_time = time.perf_counter()
+    sample_resources: bool = False,
+    profiler: str | None = None,
+) -> list[dict]:
+    sampler = ResourceSampler(
+        enabled=sample_resources,
+        pg_container=CONTAINER_NAME,
+        containers=[CONTAINER_NAME],
+    )
+    reset_harness_timings(raw_path)
     
-    with open(log_path, "a", encoding="utf-8") as log_file:
+    with open(log_path, "a", encoding="utf-8") as log_file, sampler:
+        start_time = time.perf_counter()
         write_log_header(log_file, "sql_test_kit", scenario, iteration, phase)
         
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(repo_root / "experiments" / "sql_test_kit_sales_aggregation" / "main_test.py"),
-            ],
+        cmd = [
+            sys.executable,
+            str(repo_root / "experiments" / "sql_test_kit_sales_aggregation" / "main_test.py"),
+        ]
+        if profiler:
+            output = profile_path(raw_path, "sql_test_kit", scenario, phase, iteration, "main_test", profiler)
+            cmd = profile_command(cmd, output, profiler)
+        result = sampler.run(
+            cmd,
             cwd=repo_root,
-            check=False,
             stdout=log_file,
             stderr=subprocess.STDOUT,
         )
+        
+        elapsed_ms = int((time.perf_counter() - start_time) * 1000)
     
-    elapsed_ms = int((time.perf_counter() - start_time) * 1000)
-    write_run_row(raw_path, "sql_test_kit", scenario, iteration, phase, elapsed_ms, result.returncode)
+    write_run_row(
+        raw_path,
+        "sql_test_kit",
+        scenario,
+        iteration,
+        phase,
+        elapsed_ms,
+        result.returncode,
+        {**sampler.metrics(), "profiler": profiler or ""},
+    )
+    records = collect_harness_timings(raw_path, "sql_test_kit", scenario, iteration, phase, profiler or "")
+    write_query_rows(
+        raw_path, "sql_test_kit", records, iteration, phase, result.returncode, {"profiler": profiler or ""}
+    )
     
     if result.returncode != 0:
         raise RuntimeError(f"sql-test-kit failed ({phase}/{iteration})")
 
+    return records
+
 
 def main() -> None:
     args = parse_args()
     os.chdir(REPO_ROOT)
+    cache = None
+    if args.impact_cache:
+        cache = ImpactCache(REPO_ROOT / args.out_dir, "sql_test_kit", args)
+        args.scenario = cache.pending(args.scenario, force=args.force)
+        if not args.scenario:
+            return
+        os.environ["BENCH_RESULT_DIGESTS"] = "1"
+    scenario = scenario_label(args.scenario)
+    if len(args.scenario) > 1:
+        os.environ["LOAD_ONCE"] = "1"
     
-    os.environ["DATA_SCALE"] = args.scale
-    os.environ["SCENARIO"] = args.scenario
+    set_dataset_context(args.scale, args.data_profile)
+    set_run_context(schedule=args.schedule, schedule_position=args.schedule_position)
+    if args.capture_plans:
+        os.environ["CAPTURE_PLANS"] = "1"
+    set_run_context(capture_plans="1" if args.capture_plans else "0")
+    os.environ["SCENARIO"] = ",".join(args.scenario)
     
     raw_path = REPO_ROOT / args.out_dir / "raw_runs.csv"
     ensure_results_file(raw_path)
     
-    log_path = get_log_file_path("sql_test_kit", args.scenario)
+    log_path = get_log_file_path("sql_test_kit", scenario)
     
+    passed = False
     try:
-        ensure_postgres_container_running()
+        image = "postgres:15"
+        if args.seeded:
+            image = build_seeded_image(
+                args.scale,
+                revenue=args.revenue_mode,
+                layout=args.sales_layout,
+                indexes=scenario_indexes_enabled(),
+            )
+            os.environ["DATA_PRELOADED"] = "1"
+        os.environ["PG_PROFILE"] = args.server_profile
+        os.environ["LOAD_WORKERS"] = str(args.load_workers)
+        os.environ["DATA_DELTA_ROWS"] = str(args.delta_rows)
+        os.environ["REVENUE_MODE"] = args.revenue_mode
+        os.environ["SALES_LAYOUT"] = args.sales_layout
+        set_run_context(
+            image=image,
+            server_profile=args.server_profile,
+            load_workers=str(args.load_workers),
+            delta_rows=str(args.delta_rows),
+            revenue_mode=args.revenue_mode,
+            sales_layout=args.sales_layout,
+        )
+        ensure_postgres_container_running(
+            track_statements=args.sample_resources, image=image, profile=args.server_profile, reuse=args.keep_server
+        )
         
         for i in range(1, args.warmup + 1):
-            invoke_sql_test_kit_run(REPO_ROOT, raw_path, log_path, args.scenario, i, "warmup")
+            records = invoke_sql_test_kit_run(
+                REPO_ROOT, raw_path, log_path, scenario, i, "warmup",
+                sample_resources=args.sample_resources,
+            )
+            if cache:
+                cache.observe(records)
+        
+        for i in range(args.first_iteration, args.first_iteration + args.n):
+            records = invoke_sql_test_kit_run(
+                REPO_ROOT, raw_path, log_path, scenario, i, "measured",
+                sample_resources=args.sample_resources,
+                profiler=args.profile if should_profile(args.profile, "measured", i, args.profile_every) else None,
+            )
+            if cache:
+                cache.observe(records)
         
-        for i in range(1, args.n + 1):
-            invoke_sql_test_kit_run(REPO_ROOT, raw_path, log_path, args.scenario, i, "measured")
+        if args.profile:
+            merge_profiles(
+                raw_path,
+                "sql_test_kit",
+                scenario,
+                args.profile,
+                profiled_iterations(args.profile, args.first_iteration, args.n, args.profile_every),
+            )
+        passed = True
     finally:
-        stop_postgres_container()
+        if cache:
+            cache.record(args.scenario, passed)
+        if not args.keep_server:
+            stop_postgres_container()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from bench.run_import_time import (
+    DEFERRED_IMPORTS,
+    HARNESS_IMPORTS,
+    IMPORT_BUDGET_MS,
+    imported_names,
+    measure,
+)
+
+BUDGET_SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "1.0"))
+# The fastest of a few warm runs: scheduling noise only ever adds time.
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def pycache_prefix():
+    with tempfile.TemporaryDirectory(prefix="import_budget_") as tmp:
+        yield Path(tmp)
+
+
+@pytest.mark.parametrize("tool", sorted(IMPORT_BUDGET_MS))
+def test_harness_import_budget(tool, pycache_prefix):
+    statement = "import " + ", ".join(HARNESS_IMPORTS[tool])
+    # First run fills the bytecode cache; the budget applies to warm imports.
+    _, _, exit_code = measure(statement, pycache_prefix)
+    if exit_code != 0:
+        pytest.skip(f"{tool} harness dependencies are not installed")
+
+    # The harness modules and their parent packages, each a top-level entry in the import tree.
+    own_modules = {
+        ".".join(parts[:depth])
+        for parts in (module.split(".") for module in HARNESS_IMPORTS[tool] if module != "pytest")
+        for depth in range(1, len(parts) + 1)
+    }
+    timings = []
+    for _ in range(RUNS):
+        _, roots, _ = measure(statement, pycache_prefix)
+        names = imported_names(roots)
+        for module in DEFERRED_IMPORTS[tool]:
+            assert module not in names, f"{tool} imports {module} at module load"
+        # pytest is imported first, so whatever it already loads is not counted here.
+        timings.append(sum(node.cumulative_us for node in roots if node.name in own_modules) / 1000)
+
+    import_ms = min(timings)
+    budget_ms = IMPORT_BUDGET_MS[tool] * BUDGET_SCALE
+    assert import_ms <= budget_ms, f"{tool} warm import took {import_ms:.0f} ms (budget {budget_ms:.0f} ms)"
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
+from itertools import accumulate, islice
 import csv
+import os
 import random
+import string
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator
 
 
 DEFAULT_SEED = 42
@@ -22,6 +26,16 @@ class DataScale:
 SMALL_SCALE = DataScale(products=50, customers=200, sales=5000)
 BIG_SCALE = DataScale(products=500, customers=2000, sales=50000)
 
+# Geometric sales sizes for the scale sweep; the dimensions stay at BIG_SCALE so
+# only the fact table grows.
+SWEEP_SCALES = {
+    "10k": DataScale(products=500, customers=2000, sales=10_000),
+    "100k": DataScale(products=500, customers=2000, sales=100_000),
+    "1m": DataScale(products=500, customers=2000, sales=1_000_000),
+    "10m": DataScale(products=500, customers=2000, sales=10_000_000),
+}
+SCALES = {"small": SMALL_SCALE, "big": BIG_SCALE, **SWEEP_SCALES}
+
 
 @dataclass(frozen=True)
 class Dataset:
@@ -30,30 +44,82 @@ class Dataset:
     sales: list[dict]
 
 
+@dataclass(frozen=True)
+class DistributionProfile:
+    """How sales spread over customers, products, the year, NULLs and discounts.
+
+    The defaults are the original uniform draws, call for call, so "uniform"
+    data is byte-identical to what the generator always produced.
+    """
+
+    customer_skew: float = 0.0  # Zipf exponent over customers; 0 is uniform
+    product_skew: float = 0.0  # Zipf exponent over products; 0 is uniform
+    month_weights: tuple[float, ...] | None = None  # Jan..Dec; None is uniform over days
+    price_null_rate: float = 0.05
+    discount_null_rate: float = 0.15
+    discount_pattern: str = "uniform"  # uniform | tiered | seasonal
+    wide_columns: int = 0  # extra TEXT columns on sales, attr_01..attr_NN
+    wide_width: int = 24
+
+
+# Retail-like year: a spring lull and a November/December peak.
+SEASONAL_MONTHS = (0.8, 0.7, 0.9, 0.9, 1.0, 1.0, 0.9, 0.9, 1.0, 1.1, 1.6, 2.2)
+
+DISTRIBUTION_PROFILES = {
+    "uniform": DistributionProfile(),
+    "skewed": DistributionProfile(customer_skew=1.1, product_skew=1.0),
+    "production": DistributionProfile(
+        customer_skew=1.1,
+        product_skew=1.2,
+        month_weights=SEASONAL_MONTHS,
+        price_null_rate=0.10,
+        discount_null_rate=0.40,
+        discount_pattern="seasonal",
+    ),
+    "wide": DistributionProfile(
+        customer_skew=1.1,
+        product_skew=1.2,
+        month_weights=SEASONAL_MONTHS,
+        price_null_rate=0.10,
+        discount_null_rate=0.40,
+        discount_pattern="seasonal",
+        wide_columns=20,
+    ),
+}
+
+DISCOUNT_TIERS = [Decimal("0.00"), Decimal("0.05"), Decimal("0.10"), Decimal("0.15"), Decimal("0.20"), Decimal("0.30")]
+DISCOUNT_TIER_WEIGHTS = [40, 25, 15, 10, 7, 3]
+MONTH_DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
 CATEGORIES = ["electronics", "home", "sports", "books", "toys", "beauty"]
 SEGMENTS = ["consumer", "corporate", "small_business"]
+SALES_COLUMNS = ["sale_id", "sale_ts", "customer_id", "product_id", "qty", "price", "discount"]
+# Every generated sale_ts falls in the year starting here.
+SALES_START = datetime(2023, 1, 1)
 
 
-DDL_STATEMENTS = [
+# Tables are created bare and constrained after the bulk load, so loading does
+# not pay per-row FK checks and index maintenance.
+TABLE_STATEMENTS = [
     """
     CREATE TABLE customers(
-        customer_id INT PRIMARY KEY,
+        customer_id INT NOT NULL,
         segment TEXT NOT NULL
     );
     """,
     """
     CREATE TABLE products(
-        product_id INT PRIMARY KEY,
+        product_id INT NOT NULL,
         category TEXT NOT NULL,
         active BOOLEAN NOT NULL
     );
     """,
     """
     CREATE TABLE sales(
-        sale_id INT PRIMARY KEY,
+        sale_id INT NOT NULL,
         sale_ts TIMESTAMP NOT NULL,
-        customer_id INT NOT NULL REFERENCES customers(customer_id),
-        product_id INT NOT NULL REFERENCES products(product_id),
+        customer_id INT NOT NULL,
+        product_id INT NOT NULL,
         qty INT NOT NULL,
         price NUMERIC(10, 2),
         discount NUMERIC(5, 2)
@@ -61,8 +127,177 @@ DDL_STATEMENTS = [
     """,
 ]
 
+SALES_PRIMARY_KEY_STATEMENT = "ALTER TABLE sales ADD PRIMARY KEY (sale_id);"
+CONSTRAINT_STATEMENTS = [
+    "ALTER TABLE customers ADD PRIMARY KEY (customer_id);",
+    "ALTER TABLE products ADD PRIMARY KEY (product_id);",
+    SALES_PRIMARY_KEY_STATEMENT,
+    "ALTER TABLE sales ADD FOREIGN KEY (customer_id) REFERENCES customers(customer_id);",
+    "ALTER TABLE sales ADD FOREIGN KEY (product_id) REFERENCES products(product_id);",
+]
+
+# Optional indexes for the scenario queries: S1 buckets by sale_ts, S2 joins
+# products, S6 ranks per customer.
+INDEX_STATEMENTS = [
+    "CREATE INDEX sales_sale_ts_idx ON sales (sale_ts);",
+    "CREATE INDEX sales_product_id_idx ON sales (product_id);",
+    "CREATE INDEX sales_customer_id_idx ON sales (customer_id);",
+]
+
+# heap: one plain table; monthly: range-partitioned by month of sale_ts. The
+# *_brin variants add a BRIN index on sale_ts after the load.
+SALES_LAYOUTS = ["heap", "heap_brin", "monthly", "monthly_brin"]
+BRIN_INDEX_STATEMENT = "CREATE INDEX sales_sale_ts_brin ON sales USING brin (sale_ts);"
+# A partitioned table's primary key has to include the partition key.
+PARTITIONED_PRIMARY_KEY_STATEMENT = "ALTER TABLE sales ADD PRIMARY KEY (sale_id, sale_ts);"
+
+# The full schema, in load order.
+DDL_STATEMENTS = TABLE_STATEMENTS + CONSTRAINT_STATEMENTS
+
+# Revenue as every scenario computes it, per row of `sales`.
+REVENUE_SQL = "qty * COALESCE(price, 0) * (1 - COALESCE(discount, 0))"
+# computed: evaluate REVENUE_SQL in each query; stored: a generated column filled
+# as rows are inserted; summary: stored plus materialised S1/S2 breakdowns.
+REVENUE_MODES = ["computed", "stored", "summary"]
+REVENUE_COLUMN_STATEMENT = f"ALTER TABLE sales ADD COLUMN revenue NUMERIC GENERATED ALWAYS AS ({REVENUE_SQL}) STORED;"
+SUMMARY_STATEMENTS = [
+    """
+    CREATE MATERIALIZED VIEW monthly_revenue AS
+    SELECT DATE_TRUNC('month', sale_ts)::date AS month, SUM(revenue) AS total
+    FROM sales
+    GROUP BY 1;
+    """,
+    """
+    CREATE MATERIALIZED VIEW category_revenue AS
+    SELECT p.category, SUM(s.revenue) AS total
+    FROM sales s
+    JOIN products p ON p.product_id = s.product_id
+    GROUP BY p.category;
+    """,
+]
+SUMMARY_REFRESH_STATEMENTS = [
+    "REFRESH MATERIALIZED VIEW monthly_revenue;",
+    "REFRESH MATERIALIZED VIEW category_revenue;",
+]
+
+# Postgres server profiles. "ephemeral" trades durability for load speed:
+# the data is throwaway, so WAL flushing and torn-page protection are pointless.
+SERVER_PROFILES = {
+    "stock": [],
+    "ephemeral": [
+        "-c", "fsync=off",
+        "-c", "synchronous_commit=off",
+        "-c", "full_page_writes=off",
+    ],
+}
+# Where the stock postgres image keeps its cluster; tmpfs-mounted under "ephemeral".
+PGDATA_DIR = "/var/lib/postgresql/data"
+
+
+def get_server_profile(name: str) -> list[str]:
+    if name not in SERVER_PROFILES:
+        raise ValueError(f"Unknown server profile: {name!r}")
+    return SERVER_PROFILES[name]
+
+
+def sales_partition_statements(unlogged: bool = False) -> list[str]:
+    """One partition per month of the generated year, plus a DEFAULT for anything outside it."""
+    table = "CREATE UNLOGGED TABLE" if unlogged else "CREATE TABLE"
+    statements = []
+    for month in range(12):
+        lower = SALES_START.replace(month=month + 1)
+        upper = SALES_START.replace(year=SALES_START.year + 1) if month == 11 else SALES_START.replace(month=month + 2)
+        statements.append(
+            f"{table} sales_{lower:%Y_%m} PARTITION OF sales "
+            f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}');"
+        )
+    statements.append(f"{table} sales_default PARTITION OF sales DEFAULT;")
+    return statements
+
+
+def pre_load_statements(
+    unlogged: bool = False,
+    extra_columns: Iterable[str] = (),
+    revenue: str = "computed",
+    layout: str = "heap",
+) -> list[str]:
+    """Bare tables to bulk-load into, optionally UNLOGGED (no WAL).
+
+    extra_columns are the wide-profile TEXT columns of the sales CSV being loaded.
+    With a stored revenue mode the generated column exists before the load, so
+    each insert pays for it. A monthly layout makes sales a range-partitioned
+    parent that Postgres routes each inserted or copied row through; columns
+    added to it reach every partition.
+    """
+    statements = list(TABLE_STATEMENTS)
+    if layout.startswith("monthly"):
+        statements[-1] = statements[-1].rstrip().removesuffix(";") + " PARTITION BY RANGE (sale_ts);"
+    if unlogged:
+        # Only the partitions, not a partitioned parent, can be UNLOGGED.
+        statements = [
+            stmt if "PARTITION BY" in stmt else stmt.replace("CREATE TABLE", "CREATE UNLOGGED TABLE")
+            for stmt in statements
+        ]
+    if layout.startswith("monthly"):
+        statements += sales_partition_statements(unlogged)
+    statements += [f"ALTER TABLE sales ADD COLUMN {column} TEXT;" for column in extra_columns]
+    if revenue != "computed":
+        statements.append(REVENUE_COLUMN_STATEMENT)
+    return statements
+
+
+def post_load_statements(indexes: bool = False, revenue: str = "computed", layout: str = "heap") -> list[str]:
+    """Keys, optional scenario indexes, summaries and fresh planner statistics, run after the load."""
+    statements = list(CONSTRAINT_STATEMENTS)
+    if layout.startswith("monthly"):
+        statements = [
+            PARTITIONED_PRIMARY_KEY_STATEMENT if stmt == SALES_PRIMARY_KEY_STATEMENT else stmt for stmt in statements
+        ]
+    if indexes:
+        statements += INDEX_STATEMENTS
+    if layout.endswith("_brin"):
+        statements.append(BRIN_INDEX_STATEMENT)
+    if revenue == "summary":
+        statements += SUMMARY_STATEMENTS
+    return statements + ["ANALYZE customers, products, sales;"]
+
+
+def scenario_indexes_enabled() -> bool:
+    return os.getenv("SCENARIO_INDEXES", "") == "1"
+
+
+def sales_layout() -> str:
+    layout = os.getenv("SALES_LAYOUT", "heap") or "heap"
+    if layout not in SALES_LAYOUTS:
+        raise ValueError(f"Unknown sales layout: {layout!r}")
+    return layout
+
+
+def revenue_mode() -> str:
+    mode = os.getenv("REVENUE_MODE", "computed") or "computed"
+    if mode not in REVENUE_MODES:
+        raise ValueError(f"Unknown revenue mode: {mode!r}")
+    return mode
+
+
+def revenue_sql(alias: str = "s", mode: str = "computed") -> str:
+    """The per-row revenue of sales aliased as `alias`, as the given mode reads it."""
+    if mode != "computed":
+        return f"{alias}.revenue"
+    return " * ".join(
+        [f"{alias}.qty", f"COALESCE({alias}.price, 0)", f"(1 - COALESCE({alias}.discount, 0))"]
+    )
+
+
+def after_delta_statements(revenue: str = "computed") -> list[str]:
+    """Keep the materialised summaries in step after a delta is applied or removed."""
+    return list(SUMMARY_REFRESH_STATEMENTS) if revenue == "summary" else []
+
+
 DROP_STATEMENTS = [
     "DROP VIEW IF EXISTS monthly_sales;",
+    "DROP MATERIALIZED VIEW IF EXISTS monthly_revenue;",
+    "DROP MATERIALIZED VIEW IF EXISTS category_revenue;",
     "DROP TABLE IF EXISTS sales;",
     "DROP TABLE IF EXISTS products;",
     "DROP TABLE IF EXISTS customers;",
@@ -70,11 +305,20 @@ DROP_STATEMENTS = [
 
 
 def get_scale(scale: str) -> DataScale:
-    if scale == "small":
-        return SMALL_SCALE
-    if scale == "big":
-        return BIG_SCALE
-    raise ValueError(f"Unknown scale: {scale!r}")
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale: {scale!r}")
+    return SCALES[scale]
+
+
+def get_distribution_profile(name: str) -> DistributionProfile:
+    if name not in DISTRIBUTION_PROFILES:
+        raise ValueError(f"Unknown distribution profile: {name!r}")
+    return DISTRIBUTION_PROFILES[name]
+
+
+def data_profile() -> str:
+    """The distribution profile the harnesses load, from DATA_PROFILE."""
+    return os.getenv("DATA_PROFILE", "uniform") or "uniform"
 
 
 def _rand_decimal(rng: random.Random, low: float, high: float) -> Decimal:
@@ -88,10 +332,7 @@ def _format_decimal(value: Decimal | None) -> str:
     return f"{value:.2f}"
 
 
-def generate_dataset(scale: str = "small", seed: int = DEFAULT_SEED) -> Dataset:
-    cfg = get_scale(scale)
-    rng = random.Random(seed)
-
+def _generate_dimensions(cfg: DataScale, rng: random.Random) -> tuple[list[dict], list[dict]]:
     products = []
     for product_id in range(1, cfg.products + 1):
         products.append(
@@ -105,89 +346,261 @@ def generate_dataset(scale: str = "small", seed: int = DEFAULT_SEED) -> Dataset:
     customers = []
     for customer_id in range(1, cfg.customers + 1):
         customers.append({"customer_id": customer_id, "segment": rng.choice(SEGMENTS)})
-
-    start = datetime(2023, 1, 1)
+    return products, customers
+
+
+def _id_sampler(rng: random.Random, count: int, skew: float, hot_rng: random.Random) -> Callable[[], int]:
+    """Draw ids 1..count, uniformly or Zipf-distributed over a shuffled ranking."""
+    if skew <= 0:
+        return lambda: rng.randint(1, count)
+    ranked = list(range(1, count + 1))
+    # Shuffle so the hot ids are not simply the lowest ones.
+    hot_rng.shuffle(ranked)
+    cumulative = list(accumulate(1 / rank**skew for rank in range(1, count + 1)))
+    total = cumulative[-1]
+    return lambda: ranked[bisect_left(cumulative, rng.random() * total)]
+
+
+def _iter_sales(
+    cfg: DataScale,
+    rng: random.Random,
+    profile: DistributionProfile,
+    seed: int,
+    start_id: int = 0,
+    count: int | None = None,
+) -> Iterator[dict]:
+    """Sales with ids after start_id; count=None is the full base dataset for cfg."""
+    start = SALES_START
     days_in_year = 365
+    # Rankings come from their own stream so the per-row draws stay aligned with "uniform".
+    hot_rng = random.Random(f"{seed}-ranking")
+    draw_customer = _id_sampler(rng, cfg.customers, profile.customer_skew, hot_rng)
+    draw_product = _id_sampler(rng, cfg.products, profile.product_skew, hot_rng)
+    month_cum_weights = list(accumulate(profile.month_weights)) if profile.month_weights else None
+    month_offsets = list(accumulate([0] + MONTH_DAYS[:-1]))
+    tier_cum_weights = list(accumulate(DISCOUNT_TIER_WEIGHTS))
+    extra_columns = wide_column_names(profile.wide_columns)
+
+    def draw_day() -> int:
+        if month_cum_weights is None:
+            return rng.randint(0, days_in_year - 1)
+        month = rng.choices(range(12), cum_weights=month_cum_weights)[0]
+        return month_offsets[month] + rng.randint(0, MONTH_DAYS[month] - 1)
+
+    def draw_discount(month: int) -> Decimal | None:
+        if rng.random() < profile.discount_null_rate:
+            return None
+        if profile.discount_pattern == "uniform":
+            return _rand_decimal(rng, 0, 0.3)
+        if profile.discount_pattern == "seasonal" and month in (11, 12):
+            return _rand_decimal(rng, 0.1, 0.5)
+        return rng.choices(DISCOUNT_TIERS, cum_weights=tier_cum_weights)[0]
 
     def build_sale(row_id: int, customer_id: int) -> dict:
-        day_offset = rng.randint(0, days_in_year - 1)
+        day_offset = draw_day()
         sec_offset = rng.randint(0, 24 * 60 * 60 - 1)
         sale_ts = start + timedelta(days=day_offset, seconds=sec_offset)
         qty = rng.randint(1, 5)
-        price = None if rng.random() < 0.05 else _rand_decimal(rng, 5, 500)
-        discount = None if rng.random() < 0.15 else _rand_decimal(rng, 0, 0.3)
-        return {
+        price = None if rng.random() < profile.price_null_rate else _rand_decimal(rng, 5, 500)
+        discount = draw_discount(sale_ts.month)
+        sale = {
             "sale_id": row_id,
             "sale_ts": sale_ts,
             "customer_id": customer_id,
-            "product_id": rng.randint(1, cfg.products),
+            "product_id": draw_product(),
             "qty": qty,
             "price": price,
             "discount": discount,
         }
-
-    sales = []
-    sale_id = 1
-    for customer_id in range(1, cfg.customers + 1):
-        for _ in range(2):
-            sales.append(build_sale(sale_id, customer_id))
-            sale_id += 1
-
-    remaining = cfg.sales - len(sales)
-    for _ in range(remaining):
-        customer_id = rng.randint(1, cfg.customers)
-        sales.append(build_sale(sale_id, customer_id))
+        for column in extra_columns:
+            sale[column] = "".join(rng.choices(string.ascii_lowercase, k=profile.wide_width))
+        return sale
+
+    sale_id = start_id + 1
+    if count is None:
+        # The base dataset gives every customer at least two sales.
+        for customer_id in range(1, cfg.customers + 1):
+            for _ in range(2):
+                yield build_sale(sale_id, customer_id)
+                sale_id += 1
+        count = cfg.sales - 2 * cfg.customers
+
+    for _ in range(count):
+        customer_id = draw_customer()
+        yield build_sale(sale_id, customer_id)
         sale_id += 1
 
+
+def wide_column_names(count: int) -> list[str]:
+    return [f"attr_{index:02d}" for index in range(1, count + 1)]
+
+
+def generate_dataset(scale: str = "small", seed: int = DEFAULT_SEED, profile: str = "uniform") -> Dataset:
+    cfg = get_scale(scale)
+    rng = random.Random(seed)
+    products, customers = _generate_dimensions(cfg, rng)
+    sales = list(_iter_sales(cfg, rng, get_distribution_profile(profile), seed))
     return Dataset(products=products, customers=customers, sales=sales)
 
 
-def dataset_to_csv_rows(dataset: Dataset) -> dict[str, list[dict]]:
-    def serialize_sales(rows: Iterable[dict]) -> list[dict]:
-        output = []
-        for row in rows:
-            output.append(
-                {
-                    "sale_id": row["sale_id"],
-                    "sale_ts": row["sale_ts"].strftime("%Y-%m-%d %H:%M:%S"),
-                    "customer_id": row["customer_id"],
-                    "product_id": row["product_id"],
-                    "qty": row["qty"],
-                    "price": _format_decimal(row["price"]),
-                    "discount": _format_decimal(row["discount"]),
-                }
-            )
-        return output
-
-    def serialize_products(rows: Iterable[dict]) -> list[dict]:
-        return [
-            {
-                "product_id": row["product_id"],
-                "category": row["category"],
-                "active": "true" if row["active"] else "false",
-            }
-            for row in rows
-        ]
+def generate_delta_sales(
+    scale: str,
+    start_id: int,
+    rows: int,
+    seed: int = DEFAULT_SEED,
+    profile: str = "uniform",
+) -> list[dict]:
+    """`rows` new sales with ids start_id+1.., appended on top of the base dataset.
+
+    The batch depends only on (seed, start_id), so applying batches one after
+    another from the current max sale_id always yields the same data.
+    """
+    rng = random.Random(f"{seed}-delta-{start_id}")
+    return list(_iter_sales(get_scale(scale), rng, get_distribution_profile(profile), seed, start_id, rows))
+
+
+def delta_rows() -> int:
+    """Sales appended on top of the loaded (or pre-seeded) dataset; 0 disables the delta."""
+    return int(os.getenv("DATA_DELTA_ROWS", "0"))
+
+
+MAX_SALE_ID_SQL = "SELECT COALESCE(MAX(sale_id), 0) FROM sales;"
 
-    def serialize_customers(rows: Iterable[dict]) -> list[dict]:
-        return [
-            {"customer_id": row["customer_id"], "segment": row["segment"]}
-            for row in rows
-        ]
 
+def delete_delta_statement(start_id: int) -> str:
+    """Remove an applied delta so the next run starts from the same base."""
+    return f"DELETE FROM sales WHERE sale_id > {int(start_id)};"
+
+
+def _serialize_sale(row: dict) -> dict:
     return {
-        "sales": serialize_sales(dataset.sales),
-        "products": serialize_products(dataset.products),
-        "customers": serialize_customers(dataset.customers),
+        "sale_id": row["sale_id"],
+        "sale_ts": row["sale_ts"].strftime("%Y-%m-%d %H:%M:%S"),
+        "customer_id": row["customer_id"],
+        "product_id": row["product_id"],
+        "qty": row["qty"],
+        "price": _format_decimal(row["price"]),
+        "discount": _format_decimal(row["discount"]),
+        **_extra_values(row),
     }
 
 
-def resolve_input_dir(scale: str) -> Path:
-    import os
+def _extra_values(row: dict) -> dict:
+    """Wide-profile columns, passed through as they are (TEXT or None)."""
+    return {column: value for column, value in row.items() if column not in SALES_COLUMNS}
+
+
+def _serialize_product(row: dict) -> dict:
+    return {
+        "product_id": row["product_id"],
+        "category": row["category"],
+        "active": "true" if row["active"] else "false",
+    }
+
+
+def _serialize_customer(row: dict) -> dict:
+    return {"customer_id": row["customer_id"], "segment": row["segment"]}
+
+
+def dataset_to_csv_rows(dataset: Dataset) -> dict[str, list[dict]]:
+    return {
+        "sales": [_serialize_sale(row) for row in dataset.sales],
+        "products": [_serialize_product(row) for row in dataset.products],
+        "customers": [_serialize_customer(row) for row in dataset.customers],
+    }
+
+
+def _write_csv(path: Path, rows: Iterable[dict]) -> None:
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(handle, fieldnames=list(row), lineterminator="\n")
+                writer.writeheader()
+            writer.writerow(row)
+
+
+def write_dataset_csv(
+    scale: str,
+    output_dir: Path,
+    seed: int = DEFAULT_SEED,
+    profile: str = "uniform",
+) -> Path:
+    """Write the dataset for `scale` as CSVs, streaming sales so 10M rows fit in memory."""
+    cfg = get_scale(scale)
+    rng = random.Random(seed)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    products, customers = _generate_dimensions(cfg, rng)
+    sales = _iter_sales(cfg, rng, get_distribution_profile(profile), seed)
+    _write_csv(output_dir / "products.csv", map(_serialize_product, products))
+    _write_csv(output_dir / "customers.csv", map(_serialize_customer, customers))
+    _write_csv(output_dir / "sales.csv", map(_serialize_sale, sales))
+    return output_dir
+
+
+def write_delta_csv(
+    scale: str,
+    start_id: int,
+    rows: int,
+    output_dir: Path,
+    seed: int = DEFAULT_SEED,
+    profile: str = "uniform",
+) -> Path:
+    """Write a delta batch as sales_delta_<start_id>_<rows>.csv (same columns as sales.csv)."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"sales_delta_{start_id}_{rows}.csv"
+    _write_csv(path, map(_serialize_sale, generate_delta_sales(scale, start_id, rows, seed, profile)))
+    return path
+
+
+def serialize_sales(rows: Iterable[dict]) -> list[dict]:
+    """Sales rows as the CSV strings the CSV-based loaders consume (NULL as "")."""
+    return [_serialize_sale(row) for row in rows]
+
+
+def dataset_dir_name(scale: str, profile: str) -> str:
+    return scale if profile == "uniform" else f"{scale}-{profile}"
+
+
+def ensure_dataset_csv(scale: str, profile: str = "uniform", regenerate: bool = False) -> Path:
+    """The input directory for scale/profile, generating it first if it is missing."""
+    root = Path(os.getcwd()) / "data" / "input"
+    if profile == "uniform" and scale in ("small", "big") and not (root / scale).is_dir():
+        # The committed CSVs in data/input.
+        return root
+    output_dir = root / dataset_dir_name(scale, profile)
+    if regenerate or not (output_dir / "sales.csv").exists():
+        write_dataset_csv(scale, output_dir, profile=profile)
+    return output_dir
+
+
+def count_sales_rows(scale: str) -> int:
+    """Rows in the sales CSV a harness would actually load for `scale`."""
+    lines = 0
+    with (resolve_input_dir(scale) / "sales.csv").open("rb") as handle:
+        while chunk := handle.read(1 << 20):
+            lines += chunk.count(b"\n")
+    return max(0, lines - 1)
+
+
+def resolve_input_dir(scale: str, profile: str | None = None) -> Path:
+    profile = profile or data_profile()
     cwd = Path(os.getcwd())
     root = cwd / "data" / "input"
-    candidate = root / scale
-    return candidate if candidate.is_dir() else root
+    candidate = root / dataset_dir_name(scale, profile)
+    if candidate.is_dir():
+        return candidate
+    if profile != "uniform":
+        # Falling back would load uniform data under a skewed label.
+        raise FileNotFoundError(f"No {profile!r} dataset for scale {scale!r} in {candidate}")
+    return root
+
+
+def sales_extra_columns(scale: str) -> list[str]:
+    """Wide-profile columns in the sales CSV for `scale`, beyond SALES_COLUMNS."""
+    with (resolve_input_dir(scale) / "sales.csv").open(newline="", encoding="utf-8") as handle:
+        header = next(csv.reader(handle))
+    return [column for column in header if column not in SALES_COLUMNS]
 
 
 def _parse_decimal(value: str) -> Decimal | None:
@@ -203,31 +616,21 @@ def _parse_bool(value: str) -> bool:
     return str(value).strip().lower() in {"true", "1", "t", "yes", "y"}
 
 
-def load_dataset_from_csv(scale: str = "small") -> Dataset:
-    input_dir = resolve_input_dir(scale)
-
-    def read_csv(path: Path) -> list[dict]:
-        with path.open(newline="", encoding="utf-8") as handle:
-            return list(csv.DictReader(handle))
-
-    customers_rows = read_csv(input_dir / "customers.csv")
-    products_rows = read_csv(input_dir / "products.csv")
-    sales_rows = read_csv(input_dir / "sales.csv")
-
-    customers = [
-        {"customer_id": int(row["customer_id"]), "segment": row["segment"]}
-        for row in customers_rows
-    ]
-    products = [
-        {
-            "product_id": int(row["product_id"]),
-            "category": row["category"],
-            "active": _parse_bool(row["active"]),
-        }
-        for row in products_rows
-    ]
-    sales = [
-        {
+def _parse_customer(row: dict) -> dict:
+    return {"customer_id": int(row["customer_id"]), "segment": row["segment"]}
+
+
+def _parse_product(row: dict) -> dict:
+    return {
+        "product_id": int(row["product_id"]),
+        "category": row["category"],
+        "active": _parse_bool(row["active"]),
+    }
+
+
+def _sale_parser(extra_columns: list[str]) -> Callable[[dict], dict]:
+    def parse(row: dict) -> dict:
+        return {
             "sale_id": int(row["sale_id"]),
             "sale_ts": datetime.strptime(row["sale_ts"], "%Y-%m-%d %H:%M:%S"),
             "customer_id": int(row["customer_id"]),
@@ -235,8 +638,56 @@ def load_dataset_from_csv(scale: str = "small") -> Dataset:
             "qty": int(row["qty"]),
             "price": _parse_decimal(row["price"]),
             "discount": _parse_decimal(row["discount"]),
+            **{column: row[column] or None for column in extra_columns},
         }
-        for row in sales_rows
-    ]
 
-    return Dataset(products=products, customers=customers, sales=sales)
+    return parse
+
+
+# Dimensions first, so a loader that streams table by table never has sales
+# waiting on rows that have not arrived yet.
+LOAD_TABLES = ["customers", "products", "sales"]
+DEFAULT_LOAD_BATCH_SIZE = 5000
+
+
+def load_batch_size() -> int:
+    """Rows per batch the streaming loaders parse and send at a time."""
+    return max(1, int(os.getenv("LOAD_BATCH_SIZE", str(DEFAULT_LOAD_BATCH_SIZE))))
+
+
+def iter_csv_rows(scale: str, table: str) -> Iterator[dict]:
+    """Typed rows of one input table, parsed lazily as the file is read."""
+    if table == "sales":
+        parse = _sale_parser(sales_extra_columns(scale))
+    else:
+        parse = {"customers": _parse_customer, "products": _parse_product}[table]
+    with (resolve_input_dir(scale) / f"{table}.csv").open(newline="", encoding="utf-8") as handle:
+        yield from map(parse, csv.DictReader(handle))
+
+
+def iter_csv_batches(scale: str, table: str, batch_size: int | None = None) -> Iterator[list[dict]]:
+    """Typed rows of one input table in lists of at most batch_size.
+
+    Only the current batch is held in memory, so loading through this keeps a
+    flat footprint at any scale, and the first batch can be sent before the
+    rest of the file has been read.
+    """
+    rows = iter_csv_rows(scale, table)
+    size = batch_size or load_batch_size()
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def iter_dataset_batches(scale: str, batch_size: int | None = None) -> Iterator[tuple[str, list[dict]]]:
+    """(table, batch) for every table in LOAD_TABLES order."""
+    for table in LOAD_TABLES:
+        for batch in iter_csv_batches(scale, table, batch_size):
+            yield table, batch
+
+
+def load_dataset_from_csv(scale: str = "small") -> Dataset:
+    return Dataset(
+        products=list(iter_csv_rows(scale, "products")),
+        customers=list(iter_csv_rows(scale, "customers")),
+        sales=list(iter_csv_rows(scale, "sales")),
+    )
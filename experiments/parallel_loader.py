@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, TypeVar
+
+Batch = TypeVar("Batch")
+
+
+def load_workers() -> int:
+    """Number of loader connections; 1 keeps the harness's single-connection load."""
+    return max(1, int(os.getenv("LOAD_WORKERS", "1")))
+
+
+def load_batches(
+    batches: Iterable[tuple[str, Batch]],
+    load_batch: Callable[[str, Batch], None],
+    workers: int,
+) -> None:
+    """Run load_batch(table, rows) for each batch over a thread pool, as batches arrive.
+
+    `batches` is consumed lazily and at most 2 * workers batches are parsed or in
+    flight at once, so memory stays bounded while the next batch is read alongside
+    the inserts. load_batch must use its own connection and commit; the tables have
+    to exist (and be committed) and carry no foreign keys yet, otherwise the batches
+    would wait on each other or on the dimension loads.
+    """
+    limit = 2 * workers
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loader") as pool:
+        pending: set[Future] = set()
+        for table, rows in batches:
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(pool.submit(load_batch, table, rows))
+        for future in pending:
+            future.result()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+DEFAULT_PLANS_PATH = Path("data") / "output" / "plans.jsonl"
+
+
+def capture_enabled() -> bool:
+    return os.getenv("CAPTURE_PLANS", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def plans_path() -> Path:
+    return Path(os.getenv("PLANS_PATH", str(DEFAULT_PLANS_PATH)))
+
+
+def _node_shape(node: dict) -> str:
+    label = node["Node Type"]
+    details = [
+        node[key]
+        for key in ("Strategy", "Join Type", "Relation Name", "Index Name", "Parent Relationship")
+        if key in node
+    ]
+    if details:
+        label += "[" + ",".join(details) + "]"
+    children = node.get("Plans", [])
+    if children:
+        label += "(" + " ".join(_node_shape(child) for child in children) + ")"
+    return label
+
+
+def normalise_plan(raw: Any) -> dict:
+    """Reduce EXPLAIN (FORMAT JSON) output to timings, buffer counters and shape."""
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    if isinstance(raw, list):
+        raw = raw[0]
+    root = raw["Plan"]
+    shape = _node_shape(root)
+    return {
+        "planning_ms": raw.get("Planning Time"),
+        "execution_ms": raw.get("Execution Time"),
+        "shared_hit": root.get("Shared Hit Blocks", 0),
+        "shared_read": root.get("Shared Read Blocks", 0),
+        "temp_read": root.get("Temp Read Blocks", 0),
+        "temp_written": root.get("Temp Written Blocks", 0),
+        "shape": shape,
+        "shape_hash": hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12],
+    }
+
+
+def _read_plans(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def record_plan(tool: str, scenario: str, query: str, raw: Any) -> dict:
+    path = plans_path()
+    scale = os.getenv("DATA_SCALE", "small")
+    plan = normalise_plan(raw)
+    history = [
+        entry
+        for entry in _read_plans(path)
+        if (entry["tool"], entry["scenario"], entry["query"]) == (tool, scenario, query)
+    ]
+    same_scale = [entry for entry in history if entry["scale"] == scale]
+    other_scales = {entry["scale"]: entry["shape_hash"] for entry in history if entry["scale"] != scale}
+
+    entry = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "tool": tool,
+        "scenario": scenario,
+        "query": query,
+        "scale": scale,
+        **plan,
+        "previous_shape_hash": same_scale[-1]["shape_hash"] if same_scale else None,
+        "shape_changed": bool(same_scale) and same_scale[-1]["shape_hash"] != plan["shape_hash"],
+        "scales_with_other_shape": sorted(s for s, h in other_scales.items() if h != plan["shape_hash"]),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry) + "\n")
+    return entry
+
+
+def explain_statement(sql: str) -> str:
+    return EXPLAIN_PREFIX + sql.strip().rstrip(";")
+
+
+def capture_plan(
+    explain: Callable[[str], Any],
+    tool: str,
+    scenario: str,
+    query: str,
+    sql: str,
+) -> None:
+    """Run EXPLAIN ANALYZE for sql through explain() when capture is enabled."""
+    if not capture_enabled():
+        return
+    record_plan(tool, scenario, query, explain(explain_statement(sql)))
+
+
+async def capture_plan_async(
+    explain: Callable[[str], Awaitable[Any]],
+    tool: str,
+    scenario: str,
+    query: str,
+    sql: str,
+) -> None:
+    """capture_plan for drivers whose explain() is a coroutine."""
+    if not capture_enabled():
+        return
+    record_plan(tool, scenario, query, await explain(explain_statement(sql)))
+
+
+def main() -> None:
+    latest: dict[tuple[str, str, str, str], dict] = {}
+    for entry in _read_plans(plans_path()):
+        latest[(entry["tool"], entry["scenario"], entry["query"], entry["scale"])] = entry
+
+    headers = [
+        "tool",
+        "scenario",
+        "query",
+        "scale",
+        "planning_ms",
+        "execution_ms",
+        "shared_hit",
+        "shared_read",
+        "shape_hash",
+        "flags",
+    ]
+    print("| " + " | ".join(headers) + " |")
+    print("| " + " | ".join(["---"] * len(headers)) + " |")
+    for key in sorted(latest):
+        entry = latest[key]
+        flags = []
+        if entry["shape_changed"]:
+            flags.append(f"changed since {entry['previous_shape_hash']}")
+        if entry["scales_with_other_shape"]:
+            flags.append("differs from " + ",".join(entry["scales_with_other_shape"]))
+        row = {**entry, "flags": "; ".join(flags)}
+        print("| " + " | ".join(str(row[h]) for h in headers) + " |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+from experiments.timings import current_scenario, record_timing, timed
+
+
+def prepared_statements_enabled() -> bool:
+    """Opt-in server-side prepared statements (psycopg 3), reused per pooled connection."""
+    return os.getenv("PREPARED_STATEMENTS", "") == "1"
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that keeps how long each checkout waits, as "connection_acquire".
+
+    Checkouts happen inside the timed query phase, so the waits are only held in
+    memory there; close_pool writes them out when the session is done.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkout_waits: list[tuple[str, float]] = []
+
+    def connect(self):
+        start_time = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.checkout_waits.append((current_scenario(), (time.perf_counter() - start_time) * 1000))
+
+
+def pooled_engine(url: str, pool_size: int) -> Engine:
+    """An engine meant to live for the whole pytest session.
+
+    Standalone, checkouts are pre-pinged, so a connection the server dropped
+    between tests is replaced rather than failing a scenario. Under the bench
+    runners (BENCH_TIMINGS_PATH set) they are not: the ping is a round trip
+    inside the measured query phase, and there the server outlives the engine.
+    The pool hands out the most recently returned connection first, which keeps
+    the same few connections (and their prepared statements) hot.
+    """
+    connect_args = {}
+    if prepared_statements_enabled():
+        # psycopg 3 prepares server-side after prepare_threshold executions of a
+        # statement on a connection; 0 prepares on first use.
+        url = make_url(url).set(drivername="postgresql+psycopg")
+        connect_args["prepare_threshold"] = 0
+    return create_engine(
+        url,
+        future=True,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        pool_pre_ping=not os.getenv("BENCH_TIMINGS_PATH"),
+        pool_use_lifo=True,
+        connect_args=connect_args,
+    )
+
+
+def warm_pool(engine: Engine, size: int) -> None:
+    """Open `size` connections up front so no test pays for a fresh backend."""
+    with timed("pool_warmup"):
+        connections = [engine.connect() for _ in range(size)]
+        for connection in connections:
+            connection.close()
+
+
+def close_pool(engine: Engine) -> None:
+    """Write the pool's buffered checkout waits, then dispose of it."""
+    pool = engine.pool
+    if isinstance(pool, TimedQueuePool):
+        for scenario, duration_ms in pool.checkout_waits:
+            record_timing("connection_acquire", duration_ms, scenario)
+        pool.checkout_waits.clear()
+    engine.dispose()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+from decimal import Decimal
+from typing import TYPE_CHECKING, List, Tuple
+
+from experiments.data_generator import revenue_mode
+from experiments.plan_capture import capture_plan_async
+from experiments.scenario_sql import by_category_sql, monthly_sql, revenue_checks_sql, topn_sql, total_sql
+
+if TYPE_CHECKING:
+    import asyncpg
+
+TOOL = "pytest_asyncpg"
+REVENUE_MODE = revenue_mode()
+TOTAL_SQL = total_sql(mode=REVENUE_MODE)
+MONTHLY_SQL = monthly_sql(mode=REVENUE_MODE)
+BY_CATEGORY_SQL = by_category_sql(mode=REVENUE_MODE)
+CHECKS_SQL = revenue_checks_sql(mode=REVENUE_MODE)
+TOPN_SQL = topn_sql("$1", mode=REVENUE_MODE)
+
+
+async def _fetch(pool: asyncpg.Pool, scenario: str, query: str, sql: str, *args) -> List[asyncpg.Record]:
+    """Run sql as a prepared statement on its own pooled connection."""
+    async with pool.acquire() as conn:
+        await capture_plan_async(lambda stmt: conn.fetchval(stmt, *args), TOOL, scenario, query, sql)
+        statement = await conn.prepare(sql)
+        return await statement.fetch(*args)
+
+
+async def s1_monthly_revenue(pool: asyncpg.Pool) -> Tuple[List[Tuple], Decimal | None]:
+    monthly, total = await asyncio.gather(
+        _fetch(pool, "S1", "monthly", MONTHLY_SQL),
+        _fetch(pool, "S1", "total", TOTAL_SQL),
+    )
+    return [(row["month"], row["total"]) for row in monthly], total[0]["total"]
+
+
+async def s2_category_revenue(pool: asyncpg.Pool) -> Tuple[List[Tuple], Decimal | None]:
+    by_category, total = await asyncio.gather(
+        _fetch(pool, "S2", "by_category", BY_CATEGORY_SQL),
+        _fetch(pool, "S2", "total", TOTAL_SQL),
+    )
+    return [(row["category"], row["total"]) for row in by_category], total[0]["total"]
+
+
+async def s4_revenue_checks(pool: asyncpg.Pool) -> Tuple[int, Decimal | None]:
+    (row,) = await _fetch(pool, "S4", "checks", CHECKS_SQL)
+    return row["null_count"], row["total_revenue"]
+
+
+async def s6_topn_per_customer(pool: asyncpg.Pool, n: int = 3) -> List[Tuple]:
+    rows = await _fetch(pool, "S6", "topn", TOPN_SQL, n)
+    return [(row["customer_id"], row["sale_id"], row["revenue"], row["rn"]) for row in rows]
@@ -0,0 +1,30 @@
+"""Fixture scope and query-timing hook shared by the Postgres pytest harnesses.
+
+Each conftest imports these names, which is how pytest picks up the hook.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from experiments.timings import flush_results, in_scenario, scenario_from_name, timed
+
+# Set by the bench runners when several scenarios run in one invocation: the
+# dataset is loaded once per session instead of once per test.
+LOAD_ONCE = os.getenv("LOAD_ONCE", "") == "1"
+
+
+def data_scope(fixture_name: str, config) -> str:
+    return "session" if LOAD_ONCE else "function"
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    # The call phase excludes fixture setup, so this is the scenario's query cost alone.
+    scenario = scenario_from_name(item.name)
+    with timed("query", scenario=scenario), in_scenario(scenario):
+        yield
+    # Digest the test's results only once its query time has been taken.
+    flush_results()
@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, Numeric, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -54,3 +54,19 @@ class Sale(Base):
             f"customer_id={self.customer_id!r}, product_id={self.product_id!r}, "
             f"qty={self.qty!r}, price={self.price!r}, discount={self.discount!r})"
         )
+
+
+# Materialised S1/S2 breakdowns of the stored revenue column; they exist only
+# with REVENUE_MODE=summary (see SUMMARY_STATEMENTS in data_generator.py).
+class MonthlyRevenue(Base):
+    __tablename__ = "monthly_revenue"
+
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    total: Mapped[Decimal | None] = mapped_column(Numeric)
+
+
+class CategoryRevenue(Base):
+    __tablename__ = "category_revenue"
+
+    category: Mapped[str] = mapped_column(Text, primary_key=True)
+    total: Mapped[Decimal | None] = mapped_column(Numeric)
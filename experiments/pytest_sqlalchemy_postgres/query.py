@@ -3,16 +3,34 @@ from __future__ import annotations
 from decimal import Decimal
 from typing import List, Tuple
 
-from sqlalchemy import Date, cast, func, select
+from sqlalchemy import Date, Numeric, cast, func, literal_column, select, text
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
-from .models import Product, Sale
+from experiments.data_generator import revenue_mode
+from experiments.plan_capture import capture_enabled, capture_plan
+
+from .models import CategoryRevenue, MonthlyRevenue, Product, Sale
+
+TOOL = "pytest_sqlalchemy"
+REVENUE_MODE = revenue_mode()
 
 
 def revenue_expr():
+    if REVENUE_MODE != "computed":
+        # The generated column is not mapped, so the ORM never inserts or fetches it.
+        return literal_column("sales.revenue", Numeric)
     return Sale.qty * func.coalesce(Sale.price, 0) * (1 - func.coalesce(Sale.discount, 0))
 
 
+def _capture(session: Session, scenario: str, query: str, stmt: Select) -> None:
+    if not capture_enabled():
+        return
+    dialect = session.get_bind().dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    capture_plan(lambda explain: session.execute(text(explain)).scalar(), TOOL, scenario, query, sql)
+
+
 def s1_monthly_revenue(session: Session) -> Tuple[List[Tuple], Decimal | None]:
     month = cast(func.date_trunc("month", Sale.sale_ts), Date).label("month")
     revenue = revenue_expr()
@@ -21,7 +39,12 @@ def s1_monthly_revenue(session: Session) -> Tuple[List[Tuple], Decimal | None]:
         .group_by(month)
         .order_by(month)
     )
-    total_stmt = select(func.sum(revenue).label("total"))
+    if REVENUE_MODE == "summary":
+        monthly_stmt = select(MonthlyRevenue.month, MonthlyRevenue.total).order_by(MonthlyRevenue.month)
+    # Explicit FROM: with the stored column, revenue alone does not name the table.
+    total_stmt = select(func.sum(revenue).label("total")).select_from(Sale)
+    _capture(session, "S1", "monthly", monthly_stmt)
+    _capture(session, "S1", "total", total_stmt)
     monthly = session.execute(monthly_stmt).all()
     total = session.execute(total_stmt).scalar()
     return [(row.month, row.total) for row in monthly], total
@@ -31,11 +54,16 @@ def s2_category_revenue(session: Session) -> Tuple[List[Tuple], Decimal | None]:
     revenue = revenue_expr()
     stmt = (
         select(Product.category, func.sum(revenue).label("total"))
+        .select_from(Sale)
         .join(Product, Sale.product_id == Product.product_id)
         .group_by(Product.category)
         .order_by(Product.category)
     )
-    total_stmt = select(func.sum(revenue).label("total"))
+    if REVENUE_MODE == "summary":
+        stmt = select(CategoryRevenue.category, CategoryRevenue.total).order_by(CategoryRevenue.category)
+    total_stmt = select(func.sum(revenue).label("total")).select_from(Sale)
+    _capture(session, "S2", "by_category", stmt)
+    _capture(session, "S2", "total", total_stmt)
     by_category = session.execute(stmt).all()
     total = session.execute(total_stmt).scalar()
     return [(row.category, row.total) for row in by_category], total
@@ -46,7 +74,8 @@ def s4_revenue_checks(session: Session) -> Tuple[int, Decimal | None]:
     stmt = select(
         func.count().filter(revenue.is_(None)).label("null_count"),
         func.sum(revenue).label("total_revenue"),
-    )
+    ).select_from(Sale)
+    _capture(session, "S4", "checks", stmt)
     row = session.execute(stmt).one()
     return row.null_count, row.total_revenue
 
@@ -68,6 +97,7 @@ def s6_topn_per_customer(session: Session, n: int = 3) -> List[Tuple]:
         .where(ranked.c.rn <= n)
         .order_by(ranked.c.customer_id, ranked.c.rn)
     )
+    _capture(session, "S6", "topn", stmt)
     result = session.execute(stmt).all()
     return [
         (row.customer_id, row.sale_id, row.revenue, row.rn)
@@ -0,0 +1,74 @@
+from decimal import Decimal
+import os
+from pathlib import Path
+import sqlite3
+import sys
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT_DIR))
+
+from experiments.data_generator import iter_dataset_batches, pre_load_statements, sales_extra_columns
+from experiments.pytest_hooks import pytest_runtest_call  # noqa: F401
+from experiments.timings import timed
+
+DATA_SCALE = os.getenv("DATA_SCALE", "small")
+# A Postgres database holding the same dataset (e.g. started from a seeded image)
+# to compare the in-process results with; the parity tests skip without it.
+PARITY_DATABASE_URL = os.getenv("PARITY_DATABASE_URL", "")
+# Wide data profiles carry extra TEXT columns on sales.
+EXTRA_COLUMNS = sales_extra_columns(DATA_SCALE)
+
+
+def _hundredths(value: Decimal | None) -> int | None:
+    # price and discount are NUMERIC(_, 2); see experiments.scenario_sql.SQLITE.
+    return None if value is None else int(value * 100)
+
+
+def _sqlite_row(table: str, row: dict) -> dict:
+    if table != "sales":
+        return row
+    return {
+        **row,
+        "sale_ts": row["sale_ts"].isoformat(sep=" "),
+        "price": _hundredths(row["price"]),
+        "discount": _hundredths(row["discount"]),
+    }
+
+
+def load_dataset(conn: sqlite3.Connection, scale: str) -> None:
+    for table, rows in iter_dataset_batches(scale):
+        columns = list(rows[0])
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + column for column in columns)})",
+            [_sqlite_row(table, row) for row in rows],
+        )
+    conn.commit()
+
+
+@pytest.fixture(scope="session")
+def conn():
+    # SQLite takes the shared Postgres DDL as is; keys and indexes are left out.
+    conn = sqlite3.connect(":memory:")
+    try:
+        for stmt in pre_load_statements(extra_columns=EXTRA_COLUMNS):
+            conn.execute(stmt)
+        with timed("load"):
+            load_dataset(conn, DATA_SCALE)
+        yield conn
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope="session")
+def postgres_conn():
+    if not PARITY_DATABASE_URL:
+        pytest.skip("PARITY_DATABASE_URL is not set")
+    import psycopg2
+
+    conn = psycopg2.connect(PARITY_DATABASE_URL)
+    try:
+        yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, List, Tuple
+
+from experiments.scenario_sql import (
+    SQLITE,
+    Dialect,
+    by_category_sql,
+    monthly_sql,
+    revenue_checks_sql,
+    topn_sql,
+    total_sql,
+)
+
+# DB-API placeholder per dialect: sqlite3 takes qmark, psycopg2 (the parity check) format.
+PLACEHOLDERS = {"sqlite": "?", "postgres": "%s"}
+
+
+def _fetch(conn: Any, sql: str, params: tuple = ()) -> List[tuple]:
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params)
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def s1_monthly_revenue(conn: Any, dialect: Dialect = SQLITE) -> Tuple[List[Tuple], Decimal | None]:
+    monthly = _fetch(conn, monthly_sql(dialect))
+    ((total,),) = _fetch(conn, total_sql(dialect))
+    return (
+        [(dialect.to_month(month), dialect.to_revenue(row_total)) for month, row_total in monthly],
+        dialect.to_revenue(total),
+    )
+
+
+def s2_category_revenue(conn: Any, dialect: Dialect = SQLITE) -> Tuple[List[Tuple], Decimal | None]:
+    by_category = _fetch(conn, by_category_sql(dialect))
+    ((total,),) = _fetch(conn, total_sql(dialect))
+    return (
+        [(category, dialect.to_revenue(row_total)) for category, row_total in by_category],
+        dialect.to_revenue(total),
+    )
+
+
+def s4_revenue_checks(conn: Any, dialect: Dialect = SQLITE) -> Tuple[int, Decimal | None]:
+    ((null_count, total_revenue),) = _fetch(conn, revenue_checks_sql(dialect))
+    return null_count, dialect.to_revenue(total_revenue)
+
+
+def s6_topn_per_customer(conn: Any, n: int = 3, dialect: Dialect = SQLITE) -> List[Tuple]:
+    rows = _fetch(conn, topn_sql(PLACEHOLDERS[dialect.name], dialect), (n,))
+    return [
+        (customer_id, sale_id, dialect.to_revenue(revenue), rn) for customer_id, sale_id, revenue, rn in rows
+    ]
@@ -0,0 +1,66 @@
+from collections import defaultdict
+from decimal import Decimal
+
+import pytest
+
+from experiments.scenario_sql import POSTGRES
+from experiments.timings import record_result
+
+from .query import (
+    s1_monthly_revenue,
+    s2_category_revenue,
+    s4_revenue_checks,
+    s6_topn_per_customer,
+)
+
+
+def test_s1_monthly_sum_equals_total(conn):
+    monthly, total = s1_monthly_revenue(conn)
+    record_result("S1", monthly, total)
+    assert total is not None
+    monthly_sum = sum((row_total or Decimal("0.00")) for _, row_total in monthly)
+    assert monthly_sum == total
+
+
+def test_s2_category_sum_equals_total(conn):
+    by_category, total = s2_category_revenue(conn)
+    record_result("S2", by_category, total)
+    assert total is not None
+    category_sum = sum((row_total or Decimal("0.00")) for _, row_total in by_category)
+    assert category_sum == total
+
+
+def test_s4_revenue_not_null_and_non_negative(conn):
+    null_count, total_revenue = s4_revenue_checks(conn)
+    record_result("S4", null_count, total_revenue)
+    assert null_count == 0
+    assert total_revenue is not None
+    assert total_revenue >= 0
+
+
+def test_s6_topn_per_customer(conn):
+    results = s6_topn_per_customer(conn, n=3)
+    record_result("S6", results)
+    by_customer: dict[int, list[tuple[int, Decimal, int]]] = defaultdict(list)
+    for customer_id, sale_id, revenue, rn in results:
+        assert revenue is not None
+        by_customer[customer_id].append((sale_id, revenue, rn))
+
+    for rows in by_customer.values():
+        assert len(rows) <= 3
+        for idx, (sale_id, revenue, rn) in enumerate(rows, start=1):
+            assert rn == idx
+            if idx > 1:
+                prev_sale_id, prev_revenue, _ = rows[idx - 2]
+                assert prev_revenue > revenue or (
+                    prev_revenue == revenue and prev_sale_id < sale_id
+                )
+
+
+@pytest.mark.parametrize(
+    "scenario",
+    [s1_monthly_revenue, s2_category_revenue, s4_revenue_checks, s6_topn_per_customer],
+    ids=lambda scenario: scenario.__name__,
+)
+def test_results_match_postgres(conn, postgres_conn, scenario):
+    assert scenario(conn) == scenario(postgres_conn, dialect=POSTGRES)
@@ -1,120 +1,201 @@
+from contextlib import contextmanager
 import os
 from pathlib import Path
 import sys
-import time
-import warnings
-
-warnings.filterwarnings(
-    "ignore",
-    category=DeprecationWarning,
-    module=r"testcontainers\.core\.waiting_utils",
-)
-warnings.filterwarnings(
-    "ignore",
-    category=DeprecationWarning,
-    module=r"testcontainers\.postgres",
-)
 
 import pytest
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.engine import Engine
-from sqlalchemy.exc import OperationalError
-from testcontainers.core.wait_strategies import (
-    ContainerStatusWaitStrategy,
-    LogMessageWaitStrategy,
-)
-from testcontainers.postgres import PostgresContainer
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT_DIR))
 
-from experiments.data_generator import DDL_STATEMENTS, DROP_STATEMENTS, load_dataset_from_csv
+from experiments.data_generator import (
+    DROP_STATEMENTS,
+    MAX_SALE_ID_SQL,
+    SALES_COLUMNS,
+    after_delta_statements,
+    data_profile,
+    delete_delta_statement,
+    delta_rows,
+    generate_delta_sales,
+    iter_dataset_batches,
+    post_load_statements,
+    pre_load_statements,
+    revenue_mode,
+    sales_extra_columns,
+    sales_layout,
+    scenario_indexes_enabled,
+)
+from experiments.parallel_loader import load_batches, load_workers
+from experiments.pooling import close_pool, pooled_engine, warm_pool
+from experiments.pytest_hooks import LOAD_ONCE, data_scope, pytest_runtest_call  # noqa: F401
+from experiments.timings import timed
+from experiments.worker_databases import database_name, sqlalchemy_worker_database
 
 DATA_SCALE = os.getenv("DATA_SCALE", "small")
+PG_IMAGE = os.getenv("PG_IMAGE", "postgres:15")
+# Set when PG_IMAGE is a pre-seeded image (bench/build_seeded_image.py).
+DATA_PRELOADED = os.getenv("DATA_PRELOADED", "") == "1"
+# stock or ephemeral (tmpfs cluster, no fsync, UNLOGGED tables); see SERVER_PROFILES.
+PG_PROFILE = os.getenv("PG_PROFILE", "stock")
+LOAD_WORKERS = load_workers()
+# Sales appended on top of the base dataset, e.g. to an image seeded with it.
+DELTA_ROWS = delta_rows()
+# computed, stored (generated revenue column) or summary (plus materialised S1/S2 breakdowns).
+REVENUE_MODE = revenue_mode()
+# heap or monthly range partitions of sales, each optionally with a BRIN index on sale_ts.
+SALES_LAYOUT = sales_layout()
+POOL_SIZE = max(5, LOAD_WORKERS)
+# off: a fresh container per test; session: one per pytest process;
+# cross: reuse a running container with the same image/config across processes. Those
+# containers outlive pytest; only the bench runner's cleanup_testcontainers removes them.
+REUSE_MODE = os.getenv("TC_REUSE", "off").strip().lower()
+if REUSE_MODE not in {"off", "session", "cross"}:
+    raise ValueError(f"Unknown TC_REUSE mode: {REUSE_MODE!r}")
+if REUSE_MODE == "cross":
+    # Ryuk would remove the container when this process exits.
+    os.environ.setdefault("TESTCONTAINERS_RYUK_DISABLED", "true")
+# Set by run_pytest_testcontainers --pipeline: a container it started ahead of this
+# process for it to run on, and removes again once the process exits.
+PIPELINE_CONTAINER = os.getenv("TC_PIPELINE_CONTAINER", "")
+# Wide data profiles carry extra TEXT columns on sales.
+EXTRA_COLUMNS = sales_extra_columns(DATA_SCALE)
+SALES_INSERT_COLUMNS = SALES_COLUMNS + EXTRA_COLUMNS
 
 
-class ReadyPostgresContainer(PostgresContainer):
-    def __init__(
-        self,
-        image: str = "postgres:15",
-        port: int = 5432,
-        username: str = "test_user",
-        password: str = "test_pass",
-        dbname: str = "test_db",
-        **kwargs,
-    ) -> None:
-        super().__init__(
-            image=image, port=port, username=username, password=password, dbname=dbname, **kwargs
-        )
-        self.waiting_for(LogMessageWaitStrategy("database system is ready to accept connections"))
-
-    def _connect(self) -> None:
-        ContainerStatusWaitStrategy().wait_until_ready(self)
-        deadline = time.time() + 30
-        last_exc: Exception | None = None
-        while time.time() < deadline:
-            engine = create_engine(self.get_connection_url(), future=True)
-            try:
-                with engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                return
-            except OperationalError as exc:
-                last_exc = exc
-                time.sleep(0.5)
-            finally:
-                engine.dispose()
-        raise RuntimeError("Postgres container was not ready in time") from last_exc
+INSERT_STATEMENTS = {
+    "customers": text(
+        """
+        INSERT INTO customers (customer_id, segment)
+        VALUES (:customer_id, :segment)
+        """
+    ),
+    "products": text(
+        """
+        INSERT INTO products (product_id, category, active)
+        VALUES (:product_id, :category, :active)
+        """
+    ),
+    "sales": text(
+        f"""
+        INSERT INTO sales ({", ".join(SALES_INSERT_COLUMNS)})
+        VALUES ({", ".join(f":{column}" for column in SALES_INSERT_COLUMNS)})
+        """
+    ),
+}
 
 
 def _load_dataset(conn, scale: str) -> None:
-    dataset = load_dataset_from_csv(scale=scale)
-    conn.execute(
-        text(
-            """
-            INSERT INTO customers (customer_id, segment)
-            VALUES (:customer_id, :segment)
-            """
-        ),
-        dataset.customers,
-    )
-    conn.execute(
-        text(
-            """
-            INSERT INTO products (product_id, category, active)
-            VALUES (:product_id, :category, :active)
-            """
-        ),
-        dataset.products,
-    )
-    conn.execute(
-        text(
-            """
-            INSERT INTO sales
-                (sale_id, sale_ts, customer_id, product_id, qty, price, discount)
-            VALUES
-                (:sale_id, :sale_ts, :customer_id, :product_id, :qty, :price, :discount)
-            """
-        ),
-        dataset.sales,
-    )
+    # One executemany per batch, so only a batch of parsed rows is held at a time.
+    for table, rows in iter_dataset_batches(scale):
+        conn.execute(INSERT_STATEMENTS[table], rows)
 
 
-@pytest.fixture(scope="function")
-def pg_container():
-    with ReadyPostgresContainer() as container:
-        yield container
+def _load_dataset_parallel(engine: Engine, scale: str, workers: int) -> None:
+    def load_batch(table: str, rows: list[dict]) -> None:
+        with engine.begin() as conn:
+            conn.execute(INSERT_STATEMENTS[table], rows)
 
+    load_batches(iter_dataset_batches(scale), load_batch, workers)
 
-@pytest.fixture(scope="function")
-def engine(pg_container) -> Engine:
-    engine = create_engine(pg_container.get_connection_url(), future=True)
-    with engine.begin() as conn:
-        for stmt in DROP_STATEMENTS:
-            conn.execute(text(stmt))
-        for stmt in DDL_STATEMENTS:
+
+@contextmanager
+def _applied_delta(engine: Engine):
+    """Append DELTA_ROWS sales after the current max sale_id; removed again on exit."""
+    if not DELTA_ROWS:
+        yield
+        return
+    with timed("delta"), engine.begin() as conn:
+        start_id = conn.execute(text(MAX_SALE_ID_SQL)).scalar_one()
+        rows = generate_delta_sales(DATA_SCALE, start_id, DELTA_ROWS, profile=data_profile())
+        conn.execute(INSERT_STATEMENTS["sales"], rows)
+        for stmt in after_delta_statements(REVENUE_MODE):
             conn.execute(text(stmt))
-        _load_dataset(conn, DATA_SCALE)
     try:
-        yield engine
+        yield
     finally:
-        engine.dispose()
+        with engine.begin() as conn:
+            for stmt in [delete_delta_statement(start_id), *after_delta_statements(REVENUE_MODE)]:
+                conn.execute(text(stmt))
+
+
+def _container_scope(fixture_name: str, config) -> str:
+    return "function" if REUSE_MODE == "off" and not LOAD_ONCE and not PIPELINE_CONTAINER else "session"
+
+
+@pytest.fixture(scope=_container_scope)
+def pg_container():
+    # testcontainers (and docker) load only once a container is actually needed.
+    from .containers import (
+        ReadyPostgresContainer,
+        attach_container,
+        find_reusable_container,
+        start_reusable_container,
+    )
+
+    container = ReadyPostgresContainer(image=PG_IMAGE, profile=PG_PROFILE)
+    if PIPELINE_CONTAINER:
+        yield attach_container(container, PIPELINE_CONTAINER)
+        return
+    if REUSE_MODE == "cross":
+        with timed("container_lookup"):
+            reused = find_reusable_container(container)
+        if reused is None:
+            with timed("container_start"):
+                reused = start_reusable_container(container)
+        yield reused
+        return
+
+    with timed("container_start"):
+        container.start()
+    try:
+        yield container
+    finally:
+        with timed("container_stop"):
+            container.stop()
+
+
+@pytest.fixture(scope=_container_scope)
+def pg_engine(pg_container) -> Engine:
+    """One warmed pool per container: for the whole session unless each test gets its own server."""
+    url = pg_container.get_connection_url()
+    # Under pytest-xdist with a shared (cross-reused) container, every worker
+    # loads into its own database on it.
+    template = database_name(url) if DATA_PRELOADED else None
+    with sqlalchemy_worker_database(url, template) as worker_url:
+        engine = pooled_engine(worker_url, pool_size=POOL_SIZE)
+        try:
+            warm_pool(engine, POOL_SIZE)
+            yield engine
+        finally:
+            close_pool(engine)
+
+
+@pytest.fixture(scope=data_scope)
+def engine(pg_engine) -> Engine:
+    engine = pg_engine
+    if not DATA_PRELOADED:
+        with engine.begin() as conn:
+            for stmt in DROP_STATEMENTS:
+                conn.execute(text(stmt))
+            for stmt in pre_load_statements(
+                unlogged=PG_PROFILE == "ephemeral",
+                extra_columns=EXTRA_COLUMNS,
+                revenue=REVENUE_MODE,
+                layout=SALES_LAYOUT,
+            ):
+                conn.execute(text(stmt))
+            if LOAD_WORKERS == 1:
+                with timed("load"):
+                    _load_dataset(conn, DATA_SCALE)
+        if LOAD_WORKERS > 1:
+            with timed("load"):
+                _load_dataset_parallel(engine, DATA_SCALE, LOAD_WORKERS)
+        with timed("constraints"), engine.begin() as conn:
+            for stmt in post_load_statements(
+                indexes=scenario_indexes_enabled(), revenue=REVENUE_MODE, layout=SALES_LAYOUT
+            ):
+                conn.execute(text(stmt))
+    with _applied_delta(engine):
+        yield engine
@@ -0,0 +1,150 @@
+import hashlib
+import time
+import warnings
+
+warnings.filterwarnings(
+    "ignore",
+    category=DeprecationWarning,
+    module=r"testcontainers\.core\.waiting_utils",
+)
+warnings.filterwarnings(
+    "ignore",
+    category=DeprecationWarning,
+    module=r"testcontainers\.postgres",
+)
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from testcontainers.core.config import ConnectionMode
+from testcontainers.core.docker_client import DockerClient
+from testcontainers.core.wait_strategies import (
+    ContainerStatusWaitStrategy,
+    LogMessageWaitStrategy,
+)
+from testcontainers.postgres import PostgresContainer
+
+from experiments.data_generator import PGDATA_DIR, get_server_profile
+
+REUSE_LABEL = "bench.reuse.key"
+
+
+class ReadyPostgresContainer(PostgresContainer):
+    def __init__(
+        self,
+        image: str = "postgres:15",
+        port: int = 5432,
+        username: str = "test_user",
+        password: str = "test_pass",
+        dbname: str = "test_db",
+        profile: str = "stock",
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            image=image, port=port, username=username, password=password, dbname=dbname, **kwargs
+        )
+        self.waiting_for(LogMessageWaitStrategy("database system is ready to accept connections"))
+        # Kept here rather than read back from testcontainers, whose attributes are private.
+        self.server_args = list(get_server_profile(profile))
+        self.docker_kwargs = {"tmpfs": {PGDATA_DIR: "rw"}} if profile == "ephemeral" else {}
+        if self.server_args:
+            self.with_command(["postgres", *self.server_args])
+        self.with_kwargs(**self.docker_kwargs)
+
+    def reuse_key(self) -> str:
+        config = "|".join(
+            [
+                self.image,
+                str(self.port),
+                self.username,
+                self.password,
+                self.dbname,
+                " ".join(self.server_args),
+                " ".join(sorted(self.docker_kwargs.get("tmpfs", {}))),
+            ]
+        )
+        return hashlib.sha1(config.encode("utf-8")).hexdigest()[:16]
+
+    def _connect(self) -> None:
+        ContainerStatusWaitStrategy().wait_until_ready(self)
+        wait_until_accepting(self.get_connection_url())
+
+
+class ReusedPostgresContainer:
+    """A running container started by an earlier test process, found by its reuse label."""
+
+    def __init__(self, container_id: str, client: DockerClient, username: str, password: str, dbname: str) -> None:
+        self.container_id = container_id
+        self.client = client
+        self.username = username
+        self.password = password
+        self.dbname = dbname
+
+    def get_container_host_ip(self) -> str:
+        # As DockerContainer.get_container_host_ip, so remote and DinD docker hosts work too.
+        mode = self.client.get_connection_mode()
+        if mode == ConnectionMode.gateway_ip:
+            return self.client.gateway_ip(self.container_id)
+        if mode == ConnectionMode.bridge_ip:
+            return self.client.bridge_ip(self.container_id)
+        return self.client.host()
+
+    def get_exposed_port(self, port: int) -> int:
+        if self.client.get_connection_mode().use_mapped_port:
+            return int(self.client.port(self.container_id, port))
+        return port
+
+    def get_connection_url(self) -> str:
+        host = self.get_container_host_ip()
+        port = self.get_exposed_port(5432)
+        return f"postgresql+psycopg2://{self.username}:{self.password}@{host}:{port}/{self.dbname}"
+
+
+def wait_until_accepting(url: str, timeout: float = 30.0) -> None:
+    """Poll with one pooled connection and exponential backoff until SELECT 1 succeeds."""
+    engine = create_engine(url, future=True, pool_size=1, max_overflow=0)
+    deadline = time.time() + timeout
+    delay = 0.05
+    last_exc: Exception | None = None
+    try:
+        while time.time() < deadline:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                return
+            except OperationalError as exc:
+                last_exc = exc
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+    finally:
+        engine.dispose()
+    raise RuntimeError("Postgres container was not ready in time") from last_exc
+
+
+def attach_container(container: ReadyPostgresContainer, container_id: str) -> ReusedPostgresContainer:
+    """Connect to the running container container_id, configured as container."""
+    attached = ReusedPostgresContainer(
+        container_id, container.get_docker_client(), container.username, container.password, container.dbname
+    )
+    wait_until_accepting(attached.get_connection_url())
+    return attached
+
+
+def find_reusable_container(container: ReadyPostgresContainer) -> ReusedPostgresContainer | None:
+    running = container.get_docker_client().client.containers.list(
+        filters={"label": f"{REUSE_LABEL}={container.reuse_key()}", "status": "running"}
+    )
+    if not running:
+        return None
+    return attach_container(container, running[0].id)
+
+
+def start_reusable_container(container: ReadyPostgresContainer) -> ReadyPostgresContainer:
+    """Start container labelled for later lookup; it is left running when the process exits.
+
+    Nothing in the harness removes it. bench/run_pytest_testcontainers.py does, through
+    cleanup_testcontainers; after standalone runs, remove it with
+    `docker rm -f $(docker ps -aq --filter label=bench.reuse.key)`.
+    """
+    # with_kwargs replaces rather than merges, so keep e.g. the tmpfs mount.
+    container.with_kwargs(**container.docker_kwargs, labels={REUSE_LABEL: container.reuse_key()})
+    return container.start()
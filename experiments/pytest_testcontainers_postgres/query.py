@@ -4,82 +4,53 @@ from decimal import Decimal
 from typing import List, Tuple
 
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql.elements import TextClause
 
+from experiments.data_generator import revenue_mode
+from experiments.plan_capture import capture_plan
+from experiments.scenario_sql import by_category_sql, monthly_sql, revenue_checks_sql, topn_sql, total_sql
 
-REVENUE_EXPR = "s.qty * COALESCE(s.price, 0) * (1 - COALESCE(s.discount, 0))"
+TOOL = "pytest_testcontainers"
+REVENUE_MODE = revenue_mode()
+TOTAL_SQL = text(total_sql(mode=REVENUE_MODE))
+MONTHLY_SQL = text(monthly_sql(mode=REVENUE_MODE))
+BY_CATEGORY_SQL = text(by_category_sql(mode=REVENUE_MODE))
+CHECKS_SQL = text(revenue_checks_sql(mode=REVENUE_MODE))
+TOPN_SQL = text(topn_sql(":n", mode=REVENUE_MODE))
+
+
+def _capture(conn: Connection, scenario: str, query: str, sql: TextClause, params: dict | None = None) -> None:
+    capture_plan(lambda stmt: conn.execute(text(stmt), params or {}).scalar(), TOOL, scenario, query, sql.text)
 
 
 def s1_monthly_revenue(engine: Engine) -> Tuple[List[Tuple], Decimal | None]:
-    monthly_sql = text(
-        f"""
-        SELECT DATE_TRUNC('month', s.sale_ts)::date AS month, SUM({REVENUE_EXPR}) AS total
-        FROM sales s
-        GROUP BY month
-        ORDER BY month;
-        """
-    )
-    total_sql = text(f"SELECT SUM({REVENUE_EXPR}) AS total FROM sales s;")
     with engine.connect() as conn:
-        monthly = conn.execute(monthly_sql).all()
-        total = conn.execute(total_sql).scalar()
+        _capture(conn, "S1", "monthly", MONTHLY_SQL)
+        _capture(conn, "S1", "total", TOTAL_SQL)
+        monthly = conn.execute(MONTHLY_SQL).all()
+        total = conn.execute(TOTAL_SQL).scalar()
     return [(row.month, row.total) for row in monthly], total
 
 
 def s2_category_revenue(engine: Engine) -> Tuple[List[Tuple], Decimal | None]:
-    by_category_sql = text(
-        f"""
-        SELECT p.category, SUM({REVENUE_EXPR}) AS total
-        FROM sales s
-        JOIN products p ON p.product_id = s.product_id
-        GROUP BY p.category
-        ORDER BY p.category;
-        """
-    )
-    total_sql = text(f"SELECT SUM({REVENUE_EXPR}) AS total FROM sales s;")
     with engine.connect() as conn:
-        by_category = conn.execute(by_category_sql).all()
-        total = conn.execute(total_sql).scalar()
+        _capture(conn, "S2", "by_category", BY_CATEGORY_SQL)
+        _capture(conn, "S2", "total", TOTAL_SQL)
+        by_category = conn.execute(BY_CATEGORY_SQL).all()
+        total = conn.execute(TOTAL_SQL).scalar()
     return [(row.category, row.total) for row in by_category], total
 
 
 def s4_revenue_checks(engine: Engine) -> Tuple[int, Decimal | None]:
-    sql = text(
-        f"""
-        SELECT
-            COUNT(*) FILTER (WHERE revenue IS NULL) AS null_count,
-            SUM(revenue) AS total_revenue
-        FROM (
-            SELECT {REVENUE_EXPR} AS revenue
-            FROM sales s
-        ) t;
-        """
-    )
     with engine.connect() as conn:
-        row = conn.execute(sql).one()
+        _capture(conn, "S4", "checks", CHECKS_SQL)
+        row = conn.execute(CHECKS_SQL).one()
     return row.null_count, row.total_revenue
 
 
 def s6_topn_per_customer(engine: Engine, n: int = 3) -> List[Tuple]:
-    sql = text(
-        f"""
-        WITH ranked AS (
-            SELECT
-                s.customer_id,
-                s.sale_id,
-                {REVENUE_EXPR} AS revenue,
-                ROW_NUMBER() OVER (
-                    PARTITION BY s.customer_id
-                    ORDER BY {REVENUE_EXPR} DESC, s.sale_id ASC
-                ) AS rn
-            FROM sales s
-        )
-        SELECT customer_id, sale_id, revenue, rn
-        FROM ranked
-        WHERE rn <= :n
-        ORDER BY customer_id, rn;
-        """
-    )
     with engine.connect() as conn:
-        rows = conn.execute(sql, {"n": n}).all()
+        _capture(conn, "S6", "topn", TOPN_SQL, {"n": n})
+        rows = conn.execute(TOPN_SQL, {"n": n}).all()
     return [(row.customer_id, row.sale_id, row.revenue, row.rn) for row in rows]
@@ -1,6 +1,8 @@
 from collections import defaultdict
 from decimal import Decimal
 
+from experiments.timings import record_result
+
 from .query import (
     s1_monthly_revenue,
     s2_category_revenue,
@@ -11,6 +13,7 @@ from .query import (
 
 def test_s1_monthly_sum_equals_total(engine):
     monthly, total = s1_monthly_revenue(engine)
+    record_result("S1", monthly, total)
     assert total is not None
     monthly_sum = sum((row_total or Decimal("0.00")) for _, row_total in monthly)
     assert monthly_sum == total
@@ -18,6 +21,7 @@ def test_s1_monthly_sum_equals_total(engine):
 
 def test_s2_category_sum_equals_total(engine):
     by_category, total = s2_category_revenue(engine)
+    record_result("S2", by_category, total)
     assert total is not None
     category_sum = sum((row_total or Decimal("0.00")) for _, row_total in by_category)
     assert category_sum == total
@@ -25,6 +29,7 @@ def test_s2_category_sum_equals_total(engine):
 
 def test_s4_revenue_not_null_and_non_negative(engine):
     null_count, total_revenue = s4_revenue_checks(engine)
+    record_result("S4", null_count, total_revenue)
     assert null_count == 0
     assert total_revenue is not None
     assert total_revenue >= 0
@@ -32,6 +37,7 @@ def test_s4_revenue_not_null_and_non_negative(engine):
 
 def test_s6_topn_per_customer(engine):
     results = s6_topn_per_customer(engine, n=3)
+    record_result("S6", results)
     by_customer: dict[int, list[tuple[int, Decimal, int]]] = defaultdict(list)
     for customer_id, sale_id, revenue, rn in results:
         assert revenue is not None
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable
+
+from experiments.data_generator import revenue_sql
+
+
+def _unchanged(value: Any) -> Any:
+    return value
+
+
+@dataclass(frozen=True)
+class Dialect:
+    """The engine-specific pieces of the scenario SQL, and how to read its results back.
+
+    to_month/to_revenue turn the engine's values into what Postgres returns
+    (date, NUMERIC as Decimal), so results compare exactly across backends.
+    """
+
+    name: str
+    # First day of the month of a timestamp expression, as a date.
+    month: Callable[[str], str]
+    # Number of rows in the group for which `condition` holds.
+    count_where: Callable[[str], str]
+    # Per-row revenue of sales aliased as `alias` under a revenue mode.
+    revenue: Callable[[str, str], str]
+    to_month: Callable[[Any], Any] = _unchanged
+    to_revenue: Callable[[Any], Any] = _unchanged
+
+
+POSTGRES = Dialect(
+    name="postgres",
+    month=lambda column: f"DATE_TRUNC('month', {column})::date",
+    count_where=lambda condition: f"COUNT(*) FILTER (WHERE {condition})",
+    revenue=lambda alias, mode: revenue_sql(alias, mode),
+)
+
+# SQLite has no fixed-point NUMERIC, and REAL sums would drift from Postgres, so the
+# in-process backend stores price in cents and discount in hundredths. Revenue is then
+# an exact integer in units of 10^-REVENUE_SCALE. It also has no DATE_TRUNC, and takes
+# FILTER only from 3.30 on.
+REVENUE_SCALE = 4
+SQLITE = Dialect(
+    name="sqlite",
+    month=lambda column: f"DATE({column}, 'start of month')",
+    count_where=lambda condition: f"COUNT(CASE WHEN {condition} THEN 1 END)",
+    revenue=lambda alias, mode: (
+        f"{alias}.qty * COALESCE({alias}.price, 0) * (100 - COALESCE({alias}.discount, 0))"
+    ),
+    to_month=date.fromisoformat,
+    to_revenue=lambda value: None if value is None else Decimal(value).scaleb(-REVENUE_SCALE),
+)
+
+
+def total_sql(dialect: Dialect = POSTGRES, mode: str = "computed") -> str:
+    return f"SELECT SUM({dialect.revenue('s', mode)}) AS total FROM sales s;"
+
+
+def monthly_sql(dialect: Dialect = POSTGRES, mode: str = "computed") -> str:
+    if mode == "summary":
+        # The S1 breakdown comes precomputed; the total still scans sales.
+        return "SELECT month, total FROM monthly_revenue ORDER BY month;"
+    return f"""
+        SELECT {dialect.month('s.sale_ts')} AS month, SUM({dialect.revenue('s', mode)}) AS total
+        FROM sales s
+        GROUP BY month
+        ORDER BY month;
+        """
+
+
+def by_category_sql(dialect: Dialect = POSTGRES, mode: str = "computed") -> str:
+    if mode == "summary":
+        return "SELECT category, total FROM category_revenue ORDER BY category;"
+    return f"""
+        SELECT p.category, SUM({dialect.revenue('s', mode)}) AS total
+        FROM sales s
+        JOIN products p ON p.product_id = s.product_id
+        GROUP BY p.category
+        ORDER BY p.category;
+        """
+
+
+def revenue_checks_sql(dialect: Dialect = POSTGRES, mode: str = "computed") -> str:
+    return f"""
+        SELECT
+            {dialect.count_where('revenue IS NULL')} AS null_count,
+            SUM(revenue) AS total_revenue
+        FROM (
+            SELECT {dialect.revenue('s', mode)} AS revenue
+            FROM sales s
+        ) t;
+        """
+
+
+def topn_sql(param: str, dialect: Dialect = POSTGRES, mode: str = "computed") -> str:
+    """S6; `param` is the driver's placeholder for N (:n, $1, %s, ?)."""
+    revenue = dialect.revenue("s", mode)
+    return f"""
+        WITH ranked AS (
+            SELECT
+                s.customer_id,
+                s.sale_id,
+                {revenue} AS revenue,
+                ROW_NUMBER() OVER (
+                    PARTITION BY s.customer_id
+                    ORDER BY {revenue} DESC, s.sale_id ASC
+                ) AS rn
+            FROM sales s
+        )
+        SELECT customer_id, sale_id, revenue, rn
+        FROM ranked
+        WHERE rn <= {param}
+        ORDER BY customer_id, rn;
+        """
@@ -3,22 +3,42 @@ from __future__ import annotations
 from collections import defaultdict
 from decimal import Decimal
 from pathlib import Path
+from typing import TYPE_CHECKING
 import os
 import sys
 
-import pandas as pd
-import psycopg2
-from sql_test_kit.column import Column
-from sql_test_kit.query_interpolation import (
-    InterpolationData,
-    replace_table_names_in_string_by_data_literals,
-)
-from sql_test_kit.table import Table
+# pandas, sql_test_kit and psycopg2 are imported on the path that uses them so
+# importing this module (collection, import-time checks) stays cheap.
+if TYPE_CHECKING:
+    import pandas as pd
+    from sql_test_kit.table import Table
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT_DIR))
 
-from experiments.data_generator import DDL_STATEMENTS, DROP_STATEMENTS, resolve_input_dir
+from experiments.data_generator import (
+    DROP_STATEMENTS,
+    LOAD_TABLES,
+    MAX_SALE_ID_SQL,
+    after_delta_statements,
+    data_profile,
+    delete_delta_statement,
+    delta_rows,
+    generate_delta_sales,
+    load_batch_size,
+    post_load_statements,
+    pre_load_statements,
+    resolve_input_dir,
+    revenue_mode,
+    sales_extra_columns,
+    sales_layout,
+    scenario_indexes_enabled,
+    serialize_sales,
+)
+from experiments.parallel_loader import load_batches, load_workers
+from experiments.plan_capture import capture_plan
+from experiments.scenario_sql import by_category_sql, monthly_sql, revenue_checks_sql, topn_sql, total_sql
+from experiments.timings import flush_results, record_result, timed
 
 
 DB_CFG = {
@@ -30,25 +50,49 @@ DB_CFG = {
 }
 
 DATA_SCALE = os.getenv("DATA_SCALE", "small")
-SCENARIO = os.getenv("SCENARIO", "").strip().upper()
-REVENUE_EXPR = "s.qty * COALESCE(s.price, 0) * (1 - COALESCE(s.discount, 0))"
-
+# Set when the database was started from a pre-seeded image (bench/build_seeded_image.py).
+DATA_PRELOADED = os.getenv("DATA_PRELOADED", "") == "1"
+PG_PROFILE = os.getenv("PG_PROFILE", "stock")
+LOAD_WORKERS = load_workers()
+# Sales appended on top of the base dataset, e.g. to an image seeded with it.
+DELTA_ROWS = delta_rows()
+# One scenario or a comma-separated list; empty runs all of them.
+SCENARIOS = [part.strip().upper() for part in os.getenv("SCENARIO", "").split(",") if part.strip()]
+REVENUE_MODE = revenue_mode()
+TOTAL_SQL = total_sql(mode=REVENUE_MODE)
+MONTHLY_SQL = monthly_sql(mode=REVENUE_MODE)
+BY_CATEGORY_SQL = by_category_sql(mode=REVENUE_MODE)
+CHECKS_SQL = revenue_checks_sql(mode=REVENUE_MODE)
+TOPN_SQL = topn_sql("%s", mode=REVENUE_MODE)
+# heap or monthly range partitions of sales, each optionally with a BRIN index on sale_ts.
+SALES_LAYOUT = sales_layout()
+TOOL = "sql_test_kit"
+
+
+def _capture(cur, scenario: str, query: str, sql: str, params: tuple | None = None) -> None:
+    def explain(stmt: str):
+        cur.execute(stmt, params)
+        return cur.fetchone()[0]
+
+    capture_plan(explain, TOOL, scenario, query, sql)
+
+
+def iter_dataframes():
+    """(table, DataFrame) chunks of the input CSVs, load_batch_size() rows at a time."""
+    import pandas as pd
 
-def build_dataframes():
     input_dir = resolve_input_dir(DATA_SCALE)
-
-    customers_df = pd.read_csv(input_dir / "customers.csv", dtype=object)
-    products_df = pd.read_csv(input_dir / "products.csv", dtype=object)
-    sales_df = pd.read_csv(input_dir / "sales.csv", dtype=object)
-
-    customers_df = customers_df.where(pd.notnull(customers_df), None)
-    products_df = products_df.where(pd.notnull(products_df), None)
-    sales_df = sales_df.where(pd.notnull(sales_df), None)
-
-    return customers_df, products_df, sales_df
+    for table_name in LOAD_TABLES:
+        path = input_dir / f"{table_name}.csv"
+        with pd.read_csv(path, dtype=object, chunksize=load_batch_size()) as reader:
+            for chunk in reader:
+                yield table_name, chunk.where(pd.notnull(chunk), None)
 
 
 def build_tables():
+    from sql_test_kit.column import Column
+    from sql_test_kit.table import Table
+
     customers_table = Table(
         table_path="customers",
         columns=[Column("customer_id", "INT"), Column("segment", "TEXT")],
@@ -71,12 +115,18 @@ def build_tables():
             Column("qty", "INT"),
             Column("price", "NUMERIC(10,2)"),
             Column("discount", "NUMERIC(5,2)"),
+            *(Column(name, "TEXT") for name in sales_extra_columns(DATA_SCALE)),
         ],
     )
     return customers_table, products_table, sales_table
 
 
 def _insert_dataframe(cur, table_name: str, df: pd.DataFrame, table: Table) -> None:
+    from sql_test_kit.query_interpolation import (
+        InterpolationData,
+        replace_table_names_in_string_by_data_literals,
+    )
+
     chunk_size = 1000
     columns = ", ".join(df.columns)
     for start in range(0, len(df), chunk_size):
@@ -91,33 +141,80 @@ def _insert_dataframe(cur, table_name: str, df: pd.DataFrame, table: Table) -> N
         cur.execute(insert_sql)
 
 
+def _insert_parallel(tables: dict[str, Table], workers: int) -> None:
+    from psycopg2.pool import ThreadedConnectionPool
+
+    pool = ThreadedConnectionPool(1, workers, **DB_CFG)
+
+    def load_batch(table_name: str, df: pd.DataFrame) -> None:
+        conn = pool.getconn()
+        try:
+            with conn, conn.cursor() as cur:
+                _insert_dataframe(cur, table_name, df, tables[table_name])
+        finally:
+            pool.putconn(conn)
+
+    try:
+        load_batches(iter_dataframes(), load_batch, workers)
+    finally:
+        pool.closeall()
+
+
 def prepare_database(conn) -> None:
-    customers_df, products_df, sales_df = build_dataframes()
-    customers_table, products_table, sales_table = build_tables()
+    tables = dict(zip(LOAD_TABLES, build_tables()))
 
     with conn.cursor() as cur:
         for stmt in DROP_STATEMENTS:
             cur.execute(stmt)
-        for stmt in DDL_STATEMENTS:
+        for stmt in pre_load_statements(
+            unlogged=PG_PROFILE == "ephemeral",
+            extra_columns=sales_extra_columns(DATA_SCALE),
+            revenue=REVENUE_MODE,
+            layout=SALES_LAYOUT,
+        ):
+            cur.execute(stmt)
+        with timed("load"):
+            if LOAD_WORKERS > 1:
+                # The loader connections must see the new tables.
+                conn.commit()
+                _insert_parallel(tables, LOAD_WORKERS)
+            else:
+                for table_name, df in iter_dataframes():
+                    _insert_dataframe(cur, table_name, df, tables[table_name])
+        with timed("constraints"):
+            for stmt in post_load_statements(
+                indexes=scenario_indexes_enabled(), revenue=REVENUE_MODE, layout=SALES_LAYOUT
+            ):
+                cur.execute(stmt)
+
+
+def apply_delta(conn) -> int:
+    """Append DELTA_ROWS sales after the current max sale_id; returns that id."""
+    import pandas as pd
+
+    _, _, sales_table = build_tables()
+    with conn.cursor() as cur:
+        cur.execute(MAX_SALE_ID_SQL)
+        start_id = cur.fetchone()[0]
+        rows = generate_delta_sales(DATA_SCALE, start_id, DELTA_ROWS, profile=data_profile())
+        delta_df = pd.DataFrame(serialize_sales(rows), dtype=object)
+        delta_df = delta_df.where(delta_df != "", None)
+        _insert_dataframe(cur, "sales", delta_df, sales_table)
+        for stmt in after_delta_statements(REVENUE_MODE):
             cur.execute(stmt)
-        _insert_dataframe(cur, "customers", customers_df, customers_table)
-        _insert_dataframe(cur, "products", products_df, products_table)
-        _insert_dataframe(cur, "sales", sales_df, sales_table)
+    conn.commit()
+    return start_id
 
 
 def s1_monthly_sum_equals_total(conn) -> None:
     with conn.cursor() as cur:
-        cur.execute(
-            f"""
-            SELECT DATE_TRUNC('month', s.sale_ts)::date AS month, SUM({REVENUE_EXPR}) AS total
-            FROM sales s
-            GROUP BY month
-            ORDER BY month;
-            """
-        )
+        _capture(cur, "S1", "monthly", MONTHLY_SQL)
+        _capture(cur, "S1", "total", TOTAL_SQL)
+        cur.execute(MONTHLY_SQL)
         monthly = cur.fetchall()
-        cur.execute(f"SELECT SUM({REVENUE_EXPR}) AS total FROM sales s;")
+        cur.execute(TOTAL_SQL)
         total = cur.fetchone()[0]
+    record_result("S1", monthly, total)
 
     monthly_sum = sum((row[1] or Decimal("0.00")) for row in monthly)
     assert total is not None
@@ -126,18 +223,13 @@ def s1_monthly_sum_equals_total(conn) -> None:
 
 def s2_category_sum_equals_total(conn) -> None:
     with conn.cursor() as cur:
-        cur.execute(
-            f"""
-            SELECT p.category, SUM({REVENUE_EXPR}) AS total
-            FROM sales s
-            JOIN products p ON p.product_id = s.product_id
-            GROUP BY p.category
-            ORDER BY p.category;
-            """
-        )
+        _capture(cur, "S2", "by_category", BY_CATEGORY_SQL)
+        _capture(cur, "S2", "total", TOTAL_SQL)
+        cur.execute(BY_CATEGORY_SQL)
         by_category = cur.fetchall()
-        cur.execute(f"SELECT SUM({REVENUE_EXPR}) AS total FROM sales s;")
+        cur.execute(TOTAL_SQL)
         total = cur.fetchone()[0]
+    record_result("S2", by_category, total)
 
     category_sum = sum((row[1] or Decimal("0.00")) for row in by_category)
     assert total is not None
@@ -146,18 +238,10 @@ def s2_category_sum_equals_total(conn) -> None:
 
 def s4_revenue_not_null_and_non_negative(conn) -> None:
     with conn.cursor() as cur:
-        cur.execute(
-            f"""
-            SELECT
-                COUNT(*) FILTER (WHERE revenue IS NULL) AS null_count,
-                SUM(revenue) AS total_revenue
-            FROM (
-                SELECT {REVENUE_EXPR} AS revenue
-                FROM sales s
-            ) t;
-            """
-        )
+        _capture(cur, "S4", "checks", CHECKS_SQL)
+        cur.execute(CHECKS_SQL)
         null_count, total_revenue = cur.fetchone()
+    record_result("S4", null_count, total_revenue)
 
     assert null_count == 0
     assert total_revenue is not None
@@ -166,27 +250,10 @@ def s4_revenue_not_null_and_non_negative(conn) -> None:
 
 def s6_topn_per_customer(conn, n: int = 3) -> None:
     with conn.cursor() as cur:
-        cur.execute(
-            f"""
-            WITH ranked AS (
-                SELECT
-                    s.customer_id,
-                    s.sale_id,
-                    {REVENUE_EXPR} AS revenue,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY s.customer_id
-                        ORDER BY {REVENUE_EXPR} DESC, s.sale_id ASC
-                    ) AS rn
-                FROM sales s
-            )
-            SELECT customer_id, sale_id, revenue, rn
-            FROM ranked
-            WHERE rn <= %s
-            ORDER BY customer_id, rn;
-            """,
-            (n,),
-        )
+        _capture(cur, "S6", "topn", TOPN_SQL, (n,))
+        cur.execute(TOPN_SQL, (n,))
         rows = cur.fetchall()
+    record_result("S6", rows)
 
     by_customer: dict[int, list[tuple[int, Decimal, int]]] = defaultdict(list)
     for customer_id, sale_id, revenue, rn in rows:
@@ -205,25 +272,39 @@ def s6_topn_per_customer(conn, n: int = 3) -> None:
 
 
 def run_all_tests() -> None:
+    import psycopg2
+
     with psycopg2.connect(**DB_CFG) as conn:
-        prepare_database(conn)
+        if not DATA_PRELOADED:
+            prepare_database(conn)
+        delta_start = None
+        if DELTA_ROWS:
+            with timed("delta"):
+                delta_start = apply_delta(conn)
         scenario_map = {
             "S1": s1_monthly_sum_equals_total,
             "S2": s2_category_sum_equals_total,
             "S4": s4_revenue_not_null_and_non_negative,
             "S6": s6_topn_per_customer,
         }
-        if SCENARIO:
-            scenario_fn = scenario_map.get(SCENARIO)
-            if not scenario_fn:
-                raise ValueError(f"Unknown scenario: {SCENARIO}")
-            scenario_fn(conn)
-            print(f"Scenario {SCENARIO} passed.")
+        unknown = [scenario for scenario in SCENARIOS if scenario not in scenario_map]
+        if unknown:
+            raise ValueError(f"Unknown scenario: {', '.join(unknown)}")
+        try:
+            for scenario in SCENARIOS or scenario_map:
+                with timed("query", scenario=scenario):
+                    scenario_map[scenario](conn)
+                flush_results()
+        finally:
+            if delta_start is not None:
+                conn.rollback()
+                with conn.cursor() as cur:
+                    for stmt in [delete_delta_statement(delta_start), *after_delta_statements(REVENUE_MODE)]:
+                        cur.execute(stmt)
+                conn.commit()
+        if SCENARIOS:
+            print(f"Scenario {', '.join(SCENARIOS)} passed.")
         else:
-            s1_monthly_sum_equals_total(conn)
-            s2_category_sum_equals_total(conn)
-            s4_revenue_not_null_and_non_negative(conn)
-            s6_topn_per_customer(conn)
             print("All sql-test-kit checks passed.")
 
 
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# Test names carry their scenario: test_s1_monthly_sum_equals_total, s6_topn_per_customer.
+SCENARIO_NAME = re.compile(r"^(?:test_)?(s\d+)_", re.IGNORECASE)
+# The scenario whose test is running, for timings taken deep inside it (e.g. pool checkouts).
+_CURRENT_SCENARIO: ContextVar[str] = ContextVar("current_scenario", default="")
+# Results kept by record_result until the measured phase that produced them has ended.
+_PENDING_RESULTS: list[tuple[str, tuple[object, ...]]] = []
+
+
+def record_timing(name: str, duration_ms: float, scenario: str = "") -> None:
+    """Append one named harness-side timing for the bench runner to collect.
+
+    A no-op unless BENCH_TIMINGS_PATH is set, so harnesses run standalone unchanged.
+    """
+    path = os.getenv("BENCH_TIMINGS_PATH")
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"name": name, "scenario": scenario, "duration_ms": round(duration_ms, 3)}) + "\n")
+
+
+def record_result(scenario: str, *values: object) -> None:
+    """Keep what a scenario's queries returned, for the bench impact cache.
+
+    Called from inside the timed query phase, so it only holds on to the values;
+    flush_results hashes and writes them once that phase has been recorded. A no-op
+    unless the runner asks for digests (BENCH_RESULT_DIGESTS).
+    """
+    if os.getenv("BENCH_TIMINGS_PATH") and os.getenv("BENCH_RESULT_DIGESTS", "") == "1":
+        _PENDING_RESULTS.append((scenario, values))
+
+
+def flush_results() -> None:
+    """Append a digest of each result kept by record_result since the last flush."""
+    path = os.getenv("BENCH_TIMINGS_PATH")
+    if not path or not _PENDING_RESULTS:
+        return
+    with open(path, "a", encoding="utf-8") as handle:
+        for scenario, values in _PENDING_RESULTS:
+            digest = hashlib.sha256(repr(values).encode("utf-8")).hexdigest()[:16]
+            handle.write(json.dumps({"name": "result", "scenario": scenario, "digest": digest}) + "\n")
+    _PENDING_RESULTS.clear()
+
+
+@contextmanager
+def timed(name: str, scenario: str = "") -> Iterator[None]:
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, (time.perf_counter() - start_time) * 1000, scenario)
+
+
+@contextmanager
+def in_scenario(scenario: str) -> Iterator[None]:
+    token = _CURRENT_SCENARIO.set(scenario)
+    try:
+        yield
+    finally:
+        _CURRENT_SCENARIO.reset(token)
+
+
+def current_scenario() -> str:
+    return _CURRENT_SCENARIO.get()
+
+
+def scenario_from_name(name: str) -> str:
+    match = SCENARIO_NAME.match(name)
+    return match.group(1).upper() if match else ""
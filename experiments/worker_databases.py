@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+from experiments.timings import timed
+
+# pytest-xdist names its worker processes gw0, gw1, ...; empty outside a worker.
+XDIST_WORKER = os.getenv("PYTEST_XDIST_WORKER", "")
+# Where CREATE/DROP DATABASE is issued from: every cluster has it, and no worker loads into it.
+ADMIN_DATABASE = "postgres"
+# CREATE DATABASE copies its template and fails while anyone else is connected to
+# it, including another CREATE DATABASE copying the same one, so workers take turns.
+WORKER_DATABASE_LOCK = 4_606_046
+
+
+def database_name(url: str) -> str:
+    return urlsplit(url).path.lstrip("/")
+
+
+def with_database(url: str, name: str) -> str:
+    """`url` pointing at database `name` instead, for any postgresql[+driver]:// URL."""
+    return urlunsplit(urlsplit(url)._replace(path=f"/{name}"))
+
+
+def worker_database_name(base: str, worker: str = XDIST_WORKER) -> str:
+    return f"{base}_{worker}" if worker else base
+
+
+def create_database_statements(name: str, template: str | None = None) -> list[str]:
+    """Recreate `name` from scratch, or as a copy of `template` (e.g. a seeded test_db).
+
+    Run outside a transaction. A leftover from an interrupted run is dropped first.
+    """
+    create = f'CREATE DATABASE "{name}"'
+    if template:
+        create += f' TEMPLATE "{template}"'
+    return [
+        f"SELECT pg_advisory_lock({WORKER_DATABASE_LOCK})",
+        drop_database_statement(name),
+        create,
+        f"SELECT pg_advisory_unlock({WORKER_DATABASE_LOCK})",
+    ]
+
+
+def drop_database_statement(name: str) -> str:
+    return f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'
+
+
+@contextmanager
+def sqlalchemy_worker_database(url: str, template: str | None = None) -> Iterator[str]:
+    """Yield a URL for this xdist worker's own database, created for the session and dropped after.
+
+    Outside xdist this is `url` unchanged, so a plain pytest run keeps using test_db.
+    """
+    if not XDIST_WORKER:
+        yield url
+        return
+
+    from sqlalchemy import create_engine, text
+
+    name = worker_database_name(database_name(url))
+    admin = create_engine(with_database(url, ADMIN_DATABASE), isolation_level="AUTOCOMMIT")
+    try:
+        with timed("worker_database"), admin.connect() as conn:
+            for stmt in create_database_statements(name, template):
+                conn.execute(text(stmt))
+        yield with_database(url, name)
+    finally:
+        with admin.connect() as conn:
+            conn.execute(text(drop_database_statement(name)))
+        admin.dispose()